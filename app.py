@@ -5,6 +5,8 @@ Main Application Entry Point
 This file serves as the landing page and routing hub for the Streamlit application.
 """
 
+from urllib.parse import urlparse, parse_qs
+
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -20,7 +22,9 @@ st.set_page_config(
 )
 
 # Custom CSS for mobile-first responsive design
-st.markdown("""
+@st.cache_resource
+def _app_css() -> str:
+    return """
 <style>
     /* Mobile-first styling */
     .main {
@@ -51,7 +55,90 @@ st.markdown("""
         }
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_app_css(), unsafe_allow_html=True)
+
+# Static landing page copy, built once per process
+@st.cache_resource
+def _hero_html() -> str:
+    return """
+<h1 style="
+    text-align: center;
+    background: linear-gradient(135deg, #0f2027, #203a43, #2c5364);
+    -webkit-background-clip: text;
+    font-size: 3.5em;
+    font-weight: 800;
+    text-shadow: 2px 2px 6px rgba(0,0,0,0.2);
+    letter-spacing: -2px;
+    margin-bottom: -4px;
+">
+    comPASS
+</h1>
+
+<p style="
+    text-align: center;
+    margin-bottom: 30px;
+">
+     🧭Your Smart Analytics Platform
+</p>
+"""
+
+
+@st.cache_resource
+def _welcome_md() -> str:
+    return """
+### Welcome to comPASS
+
+**For Tutorial Centers, Schools, and Independent Tutors**
+
+Transform your test data into actionable insights with:
+- 📈 Real-time analytics dashboards
+- 🎯 Student risk classification
+- 🤖 AI-powered revision recommendations
+- 📄 Comprehensive performance reports
+
+Get immediate intelligence after a single test.
+"""
+
+
+@st.cache_resource
+def _how_it_works_md() -> str:
+    return """
+**For Teachers:**
+1. Sign up and log in securely
+2. Create a new test with subject, duration, and access code
+3. Upload questions in CSV format
+4. Share the test link and access code with students
+5. Monitor submissions and view analytics
+6. Download comprehensive PDF reports
+
+**For Students:**
+1. Open the test link shared by your teacher
+2. Enter your name and access code
+3. Answer questions one at a time
+4. Submit and get immediate feedback
+5. View your weak topics and AI-generated advice
+"""
+
+
+@st.cache_resource
+def _key_features_md() -> tuple:
+    analytics = """
+**Analytics Engine**
+- Topic-wise performance breakdown
+- Student risk scoring (High/Medium/Low)
+- Class readiness indicator
+"""
+    ai = """
+**AI Insights**
+- Natural language recommendations
+- Priority revision topics
+- Intervention strategies
+- Data-driven decision support
+"""
+    return analytics, ai
+
 
 def main():
     """
@@ -117,46 +204,11 @@ def main():
     # height=300,
     # )
 
-    st.markdown(
-        """
-        <h1 style="
-            text-align: center;
-            background: linear-gradient(135deg, #0f2027, #203a43, #2c5364);
-            -webkit-background-clip: text;
-            font-size: 3.5em;
-            font-weight: 800;
-            text-shadow: 2px 2px 6px rgba(0,0,0,0.2);
-            letter-spacing: -2px;
-            margin-bottom: -4px;
-        ">
-            comPASS
-        </h1>
-
-        <p style="
-            text-align: center;
-            margin-bottom: 30px;
-        ">
-             🧭Your Smart Analytics Platform
-        </p>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_hero_html(), unsafe_allow_html=True)
     
     # Hero section
 
-    st.markdown("""
-    ### Welcome to comPASS
-    
-    **For Tutorial Centers, Schools, and Independent Tutors**
-    
-    Transform your test data into actionable insights with:
-    - 📈 Real-time analytics dashboards
-    - 🎯 Student risk classification
-    - 🤖 AI-powered revision recommendations
-    - 📄 Comprehensive performance reports
-    
-    Get immediate intelligence after a single test.
-    """)
+    st.markdown(_welcome_md())
     
     # with col2:
     #     st.info("**Quick Stats**\n\n✅ Instant grading\n\n✅ Mobile-optimized\n\n✅ Zero setup friction")
@@ -193,11 +245,10 @@ def main():
         
         if st.button("📝 Access Test", use_container_width=True):
             if student_test_id:
-                test_id = (
-                    student_test_id.split("id=")[-1].split("&")[0]
-                    if "id=" in student_test_id
-                    else student_test_id
-                )
+                # Accept a full link, a bare "id=..." query or a plain test ID
+                parsed = urlparse(student_test_id.strip())
+                query = parse_qs(parsed.query or parsed.path)
+                test_id = query.get("id", [student_test_id])[0]
 
                 # ✅ STORE in session_state (THIS is the key)
                 st.session_state["active_test_id"] = test_id.strip()
@@ -214,42 +265,17 @@ def main():
     
     # Features overview
     with st.expander("📖 How It Works"):
-        st.markdown("""
-        **For Teachers:**
-        1. Sign up and log in securely
-        2. Create a new test with subject, duration, and access code
-        3. Upload questions in CSV format
-        4. Share the test link and access code with students
-        5. Monitor submissions and view analytics
-        6. Download comprehensive PDF reports
-        
-        **For Students:**
-        1. Open the test link shared by your teacher
-        2. Enter your name and access code
-        3. Answer questions one at a time
-        4. Submit and get immediate feedback
-        5. View your weak topics and AI-generated advice
-        """)
+        st.markdown(_how_it_works_md())
     
     with st.expander("🎯 Key Features"):
+        analytics_md, ai_md = _key_features_md()
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("""
-            **Analytics Engine**
-            - Topic-wise performance breakdown
-            - Student risk scoring (High/Medium/Low)
-            - Class readiness indicator
-            """)
+            st.markdown(analytics_md)
         
         with col2:
-            st.markdown("""
-            **AI Insights**
-            - Natural language recommendations
-            - Priority revision topics
-            - Intervention strategies
-            - Data-driven decision support
-            """)
+            st.markdown(ai_md)
     
     # Footer
     st.markdown("")
@@ -11,11 +11,34 @@ This page handles:
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-import random
-import string
+import base64
+import secrets
+import hashlib
 from utils.auth import require_authentication, get_current_user_id
 from utils.firebase import create_test, create_questions_batch
+from utils.firebase_cached import cached_tests_by_teacher
+
+# Length of generated access codes
+ACCESS_CODE_LENGTH = 6
+
+# Sample question template shown in the CSV format guide (never changes)
+SAMPLE_QUESTIONS = {
+    'question': [
+        "What is the SI unit of force?",
+        "Which law states that for every action there is an equal and opposite reaction?",
+        "What is the speed of light in vacuum?"
+    ],
+    'option_a': ["Newton", "Newton's First Law", "3 × 10^8 m/s"],
+    'option_b': ["Joule", "Newton's Second Law", "3 × 10^6 m/s"],
+    'option_c': ["Watt", "Newton's Third Law", "3 × 10^10 m/s"],
+    'option_d': ["Pascal", "Law of Gravitation", "3 × 10^5 m/s"],
+    'correct_option': ["A", "C", "A"],
+    'topic': ["Units", "Mechanics", "Waves and Optics"],
+}
+_SAMPLE_DF = pd.DataFrame(SAMPLE_QUESTIONS)
+_SAMPLE_CSV_BYTES = _SAMPLE_DF.to_csv(index=False).encode("utf-8")
 
 # Protect this page - require login
 require_authentication()
@@ -28,34 +51,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-def is_mobile_device():
-    """Detect if user is on mobile device via JavaScript."""
-    import streamlit.components.v1 as components
-    
-    # Use JavaScript to detect mobile
-    mobile_check = components.html(
-        """
-        <script>
-        function isMobile() {
-            return /Android|webOS|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini/i.test(navigator.userAgent) 
-                   || window.innerWidth <= 768;
-        }
-        
-        // Send result to Streamlit
-        const mobile = isMobile();
-        window.parent.postMessage({
-            type: 'streamlit:setComponentValue',
-            value: mobile
-        }, '*');
-        </script>
-        """,
-        height=0
-    )
-    
-    return mobile_check if mobile_check is not None else False
-
 # Custom CSS
-st.markdown("""
+@st.cache_resource
+def _create_test_css() -> str:
+    return """
 <style>
     .success-box {
         padding: 1.5rem;
@@ -73,18 +72,24 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_create_test_css(), unsafe_allow_html=True)
 
 # ========================================
 # STATE MANAGEMENT
 # ========================================
 
+def generate_access_code() -> str:
+    """Random uppercase access code from a single CSPRNG read (base32: A-Z, 2-7)"""
+    return base64.b32encode(secrets.token_bytes(4)).decode()[:ACCESS_CODE_LENGTH]
+
 def init_form_state():
     """Initialize form state with defaults - called ONCE per fresh form"""
     default_expiry = datetime.now() + timedelta(days=7)
     st.session_state.form_expiry_date = default_expiry.date()
     st.session_state.form_expiry_time = default_expiry.time()
-    st.session_state.form_access_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    st.session_state.form_access_code = generate_access_code()
 
 def clear_form_state():
     """Clear all form-related state"""
@@ -97,6 +102,76 @@ def clear_form_state():
         if key in st.session_state:
             del st.session_state[key]
 
+
+def _column_has_nulls(series: pd.Series) -> bool:
+    """Arrow-backed columns track their null count, so no mask is needed."""
+    pa_array = getattr(series.array, "_pa_array", None)
+    if pa_array is not None:
+        return pa_array.null_count > 0
+    return bool(series.isnull().any())
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=600)
+def validate_questions_csv(csv_hash, _df):
+    """
+    Validate an uploaded questions DataFrame.
+    
+    Cached on the file's content hash, so reruns triggered by unrelated
+    widgets skip re-validation entirely. Bounded, since each entry holds a
+    copy of an upload of up to 5MB and the cache is shared by all teachers.
+    
+    Returns:
+        tuple: (normalized_df, errors, warnings)
+    """
+    df = _df.copy()
+    validation_errors = []
+    validation_warnings = []
+    
+    # Required columns
+    required_columns = [
+        'question', 'option_a', 'option_b', 'option_c', 'option_d',
+        'correct_option', 'topic'
+    ]
+    
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:
+        validation_errors.append(f"❌ Missing columns: {', '.join(missing)}")
+    
+    # Empty cells (mask only built for columns that actually contain nulls)
+    null_columns = [col for col in df.columns if _column_has_nulls(df[col])]
+    if null_columns:
+        null_mask = df[null_columns].isnull().to_numpy()
+        null_cols, null_rows = np.nonzero(null_mask.T)
+        empty_locs = [
+            f"{null_columns[c]}: rows {null_rows[null_cols == c].tolist()}"
+            for c in np.unique(null_cols)
+        ]
+        validation_errors.append(f"❌ Empty cells in: {', '.join(empty_locs)}")
+    
+    # Correct option validation (one string conversion, reused for the check)
+    if 'correct_option' in df.columns:
+        correct_str = df['correct_option'].astype(str).str.upper().str.strip()
+        df['correct_option'] = correct_str
+        invalid_mask = ~np.isin(correct_str.to_numpy(), ['A', 'B', 'C', 'D'])
+        if invalid_mask.any():
+            validation_errors.append(
+                f"❌ Invalid correct_option in rows: {np.flatnonzero(invalid_mask).tolist()}. Must be A/B/C/D"
+            )
+
+    # Question length (text columns are measured directly, no astype copy)
+    if 'question' in df.columns:
+        question_col = df['question']
+        if not pd.api.types.is_string_dtype(question_col):
+            question_col = question_col.astype(str)
+        long_mask = (question_col.str.len() > 500).to_numpy(dtype=bool, na_value=False)
+        if long_mask.any():
+            validation_warnings.append(
+                f"⚠️ Long questions (>500 chars) in rows: {np.flatnonzero(long_mask).tolist()}"
+            )
+    
+    return df, validation_errors, validation_warnings
+
+
 # Check if returning from another page with stale success state
 if 'last_page' not in st.session_state:
     st.session_state.last_page = 'create_test'
@@ -136,27 +211,11 @@ with st.expander("📋 CSV Format Guide - Click to View Required Format"):
     """)
     
     # Download sample CSV
-    sample_data = {
-        'question': [
-            "What is the SI unit of force?",
-            "Which law states that for every action there is an equal and opposite reaction?",
-            "What is the speed of light in vacuum?"
-        ],
-        'option_a': ["Newton", "Newton's First Law", "3 × 10^8 m/s"],
-        'option_b': ["Joule", "Newton's Second Law", "3 × 10^6 m/s"],
-        'option_c': ["Watt", "Newton's Third Law", "3 × 10^10 m/s"],
-        'option_d': ["Pascal", "Law of Gravitation", "3 × 10^5 m/s"],
-        'correct_option': ["A", "C", "A"],
-        'topic': ["Units", "Mechanics", "Waves and Optics"],
-    }
-    sample_df = pd.DataFrame(sample_data)
-
-    st.dataframe(sample_df, use_container_width=True, height=200)
+    st.table(_SAMPLE_DF)
     
-    csv = sample_df.to_csv(index=False)
     st.download_button(
         label="📥 Download Sample CSV Template",
-        data=csv,
+        data=_SAMPLE_CSV_BYTES,
         file_name="compass_sample_questions.csv",
         mime="text/csv",
         use_container_width=True
@@ -173,70 +232,65 @@ st.markdown("")
 
 st.markdown("### Step 1: Test Information")
 
-col1, col2 = st.columns(2)
+# Inputs are batched in a form so typing doesn't rerun the whole page;
+# session state is only updated when the teacher saves.
+with st.form("test_meta"):
+    col1, col2 = st.columns(2)
 
-with col1:
-    test_title = st.text_input(
-        "Test Title *",
-        placeholder="e.g., JAMB Physics Mock Test 1",
-        help="Give your test a descriptive name"
-    )
-    
-    subject = st.text_input(
-        "Subject *",
-        placeholder="e.g., Physics",
-        help="Subject area being tested"
-    )
+    with col1:
+        test_title = st.text_input(
+            "Test Title *",
+            placeholder="e.g., JAMB Physics Mock Test 1",
+            help="Give your test a descriptive name"
+        )
+        
+        subject = st.text_input(
+            "Subject *",
+            placeholder="e.g., Physics",
+            help="Subject area being tested"
+        )
 
-with col2:
-    duration = st.number_input(
-        "Duration (minutes) *",
-        min_value=5,
-        max_value=240,
-        value=45,
-        step=5,
-        help="How long students have to complete the test"
-    )
-    
-    expiry_date = st.date_input(
-        "Expiry Date *",
-        value=st.session_state.form_expiry_date,
-        min_value=datetime.now().date(),
-        help="Last date students can take this test"
-    )
-    
-    # Update session state when user changes date
-    if expiry_date != st.session_state.form_expiry_date:
-        st.session_state.form_expiry_date = expiry_date
- 
-    expiry_time = st.time_input(
-        "Expiry Time *",
-        value=st.session_state.form_expiry_time,
-        help="Time when test closes on expiry date"
-    )
-    
-    # Update session state when user changes time
-    if expiry_time != st.session_state.form_expiry_time:
-        st.session_state.form_expiry_time = expiry_time
-
-col1, col2 = st.columns([3, 1])
-
-with col1:
-    access_code = st.text_input(
-        "Access Code *",
-        value=st.session_state.form_access_code,
-        max_chars=8,
-        help="Students need this code to access the test"
-    )
-    
-    # Update session state if user manually edits
-    if access_code != st.session_state.form_access_code:
-        st.session_state.form_access_code = access_code
+        access_code = st.text_input(
+            "Access Code *",
+            value=st.session_state.form_access_code,
+            max_chars=8,
+            help="Students need this code to access the test"
+        )
 
-with col2:
-    if st.button("🔄 Generate New", use_container_width=True):
-        st.session_state.form_access_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        st.rerun()
+    with col2:
+        duration = st.number_input(
+            "Duration (minutes) *",
+            min_value=5,
+            max_value=240,
+            value=45,
+            step=5,
+            help="How long students have to complete the test"
+        )
+        
+        expiry_date = st.date_input(
+            "Expiry Date *",
+            value=st.session_state.form_expiry_date,
+            min_value=datetime.now().date(),
+            help="Last date students can take this test"
+        )
+        
+        expiry_time = st.time_input(
+            "Expiry Time *",
+            value=st.session_state.form_expiry_time,
+            help="Time when test closes on expiry date"
+        )
+
+    meta_saved = st.form_submit_button("💾 Save Test Information", use_container_width=True)
+
+if meta_saved:
+    st.session_state.form_expiry_date = expiry_date
+    st.session_state.form_expiry_time = expiry_time
+    st.session_state.form_access_code = access_code
+
+# Buttons can't live inside a form, so the generator sits just below it
+if st.button("🔄 Generate New Access Code"):
+    st.session_state.form_access_code = generate_access_code()
+    st.rerun()
 
 st.markdown("")
 st.markdown("")
@@ -252,127 +306,109 @@ if 'csv_processed' not in st.session_state:
     st.session_state.csv_processed = False
 if 'csv_df' not in st.session_state:
     st.session_state.csv_df = None
+if 'csv_hash' not in st.session_state:
+    st.session_state.csv_hash = None
 if 'csv_name' not in st.session_state:
     st.session_state.csv_name = None
 if 'questions_valid' not in st.session_state:
     st.session_state.questions_valid = False
-if 'questions_data' not in st.session_state:
-    st.session_state.questions_data = []
-if 'device_checked' not in st.session_state:
-    st.session_state.device_checked = False
-if 'is_mobile' not in st.session_state:
-    st.session_state.is_mobile = False
-
-# Detect device type once
-if not st.session_state.device_checked:
-    # Simple viewport-based detection (more reliable than JS injection)
-    st.markdown("""
-    <script>
-    const mobile = window.innerWidth <= 768 || /Android|webOS|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini/i.test(navigator.userAgent);
-    window.parent.postMessage({isMobile: mobile}, '*');
-    </script>
-    """, unsafe_allow_html=True)
-    
-    # Fallback: assume desktop if cannot detect
-    # Mobile users will see the warning message either way
-    st.session_state.device_checked = True
-
-# Check viewport width via CSS media query approach
-viewport_check = st.empty()
-with viewport_check:
-    # Use CSS to detect viewport and update session state
-    mobile_detected = st.checkbox(
-        "I'm using a mobile device (auto-detected)",
-        key="mobile_checkbox",
-        value=False,
-        help="Automatic detection based on screen size"
-    )
-    st.session_state.is_mobile = mobile_detected
-
-# Clear the detection checkbox
-viewport_check.empty()
+if 'questions_df' not in st.session_state:
+    st.session_state.questions_df = None
 
 # Simplified detection: Check user agent via query params or manual flag
 # More reliable: Let user self-identify if upload fails
+upload_area = st.empty()
 if not st.session_state.csv_processed:
-    # Show mobile warning first
-    st.info("ℹ️ **Choose your Device Type**")
-
-    device_type = st.radio(
-        "What device are you using?",
-        ["Desktop / Laptop", "Mobile / Tablet"],
-        horizontal=True
-    )
-    st.markdown("")
-    
-    # Conditional upload based on device
-    if device_type == "Mobile / Tablet":
-        # Mobile: Show restriction message
-        st.warning("📱 **Mobile Upload Restricted**")
-        st.markdown("""
-        ### Question CSV Upload Unavailable on Mobile
-        
-        Due to browser limitations, CSV file uploads are currently supported on **desktop browsers only**.
-        
-        **To create a test with questions:**
-        1. Switch to a laptop or desktop computer
-        2. Access comPASS in a desktop browser (Chrome, Firefox, Safari, Edge)
-        3. Complete the test creation with CSV upload
-        
-        **On mobile, you can:**
-        - ✅ View existing tests
-        - ✅ Monitor submissions
-        - ✅ Download reports
-        - ✅ Manage test settings
-        
-        **Need help?**
-        - Contact support if you only have mobile access
-        - Download the sample CSV template for desktop use
-        """)
-
-        # Stop further processing
-        questions_valid = False
-        questions_data = []
-    
-    else:
-        # Desktop: Normal file upload
-        
-        uploaded_file = st.file_uploader(
-            "Choose a CSV file",
-            type=['csv'],
-            help="Upload your questions in CSV format (see format guide above)",
-            key="csv_file_uploader"
+    with upload_area.container():
+        # Show mobile warning first
+        st.info("ℹ️ **Choose your Device Type**")
+
+        # Self-identified device type persists in session state across reruns
+        device_type = st.radio(
+            "What device are you using?",
+            ["Desktop / Laptop", "Mobile / Tablet"],
+            horizontal=True,
+            key="device_type"
         )
+        st.markdown("")
         
-        if uploaded_file is not None:
-            try:
-                # Read file content immediately
-                bytes_data = uploaded_file.read()
-                file_name = uploaded_file.name
-                
-                # Validate size
-                if len(bytes_data) > 5 * 1024 * 1024:
-                    st.error("❌ File too large. Maximum size is 5MB.")
-                    st.stop()
-                
-                # Parse CSV from bytes
-                import io
-                df = pd.read_csv(io.BytesIO(bytes_data))
-                
-                # Store in session state
-                st.session_state.csv_df = df
-                st.session_state.csv_name = file_name
-                st.session_state.csv_processed = True
-                
-                # Immediate rerun
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"❌ Error reading CSV: {str(e)}")
-                st.info("💡 Ensure file is valid CSV format")
-
-else:
-    # File already processed - show validation
+        # Conditional upload based on device
+        if device_type == "Mobile / Tablet":
+            # Mobile: Show restriction message
+            st.warning("📱 **Mobile Upload Restricted**")
+            st.markdown("""
+            ### Question CSV Upload Unavailable on Mobile
+            
+            Due to browser limitations, CSV file uploads are currently supported on **desktop browsers only**.
+            
+            **To create a test with questions:**
+            1. Switch to a laptop or desktop computer
+            2. Access comPASS in a desktop browser (Chrome, Firefox, Safari, Edge)
+            3. Complete the test creation with CSV upload
+            
+            **On mobile, you can:**
+            - ✅ View existing tests
+            - ✅ Monitor submissions
+            - ✅ Download reports
+            - ✅ Manage test settings
+            
+            **Need help?**
+            - Contact support if you only have mobile access
+            - Download the sample CSV template for desktop use
+            """)
+
+            # Stop further processing
+            questions_valid = False
+            questions_df = None
+        
+        else:
+            # Desktop: Normal file upload
+            
+            uploaded_file = st.file_uploader(
+                "Choose a CSV file",
+                type=['csv'],
+                help="Upload your questions in CSV format (see format guide above)",
+                key="csv_file_uploader"
+            )
+            
+            if uploaded_file is not None:
+                try:
+                    # Read file content immediately
+                    bytes_data = uploaded_file.read()
+                    file_name = uploaded_file.name
+                    
+                    # Validate size
+                    if len(bytes_data) > 5 * 1024 * 1024:
+                        st.error("❌ File too large. Maximum size is 5MB.")
+                        st.stop()
+                    
+                    # Parse CSV from bytes: pyarrow reads the buffer in place in
+                    # 1 MB blocks (imported here so page load doesn't pay for it)
+                    import pyarrow as pa
+                    import pyarrow.csv as pacsv
+                    table = pacsv.read_csv(
+                        pa.BufferReader(bytes_data),
+                        read_options=pacsv.ReadOptions(block_size=1 << 20),
+                        convert_options=pacsv.ConvertOptions(strings_can_be_null=True)
+                    )
+                    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+                    del table
+                    
+                    # Store in session state
+                    st.session_state.csv_df = df
+                    st.session_state.csv_hash = hashlib.blake2b(bytes_data, digest_size=16).hexdigest()
+                    st.session_state.csv_name = file_name
+                    st.session_state.csv_processed = True
+                    
+                    # Swap the uploader out and validate below in this same run
+                    upload_area.empty()
+                    
+                except Exception as e:
+                    st.error(f"❌ Error reading CSV: {str(e)}")
+                    st.info("💡 Ensure file is valid CSV format")
+
+if st.session_state.csv_processed:
+    # File processed (this run or an earlier one) - show validation
     df = st.session_state.csv_df
     
     st.info(f"📄 File loaded: **{st.session_state.csv_name}** ({len(df)} rows)")
@@ -380,44 +416,9 @@ else:
     # Validation section
     st.markdown("#### Validation Results")
     
-    validation_errors = []
-    validation_warnings = []
-    
-    # Required columns
-    required_columns = [
-        'question', 'option_a', 'option_b', 'option_c', 'option_d',
-        'correct_option', 'topic'
-    ]
-    
-    missing = [col for col in required_columns if col not in df.columns]
-    if missing:
-        validation_errors.append(f"❌ Missing columns: {', '.join(missing)}")
-    
-    # Empty cells
-    if df.isnull().any().any():
-        empty_locs = []
-        for col in df.columns:
-            empty_rows = df[df[col].isnull()].index.tolist()
-            if empty_rows:
-                empty_locs.append(f"{col}: rows {empty_rows}")
-        validation_errors.append(f"❌ Empty cells in: {', '.join(empty_locs)}")
-    
-    # Correct option validation
-    if 'correct_option' in df.columns:
-        df['correct_option'] = df['correct_option'].astype(str).str.upper().str.strip()
-        invalid_opts = df[~df['correct_option'].isin(['A', 'B', 'C', 'D'])]
-        if not invalid_opts.empty:
-            validation_errors.append(
-                f"❌ Invalid correct_option in rows: {invalid_opts.index.tolist()}. Must be A/B/C/D"
-            )
-
-    # Question length
-    if 'question' in df.columns:
-        long_qs = df[df['question'].astype(str).str.len() > 500]
-        if not long_qs.empty:
-            validation_warnings.append(
-                f"⚠️ Long questions (>500 chars) in rows: {long_qs.index.tolist()}"
-            )
+    df, validation_errors, validation_warnings = validate_questions_csv(
+        st.session_state.csv_hash, st.session_state.csv_df
+    )
     
     # Display results
     for error in validation_errors:
@@ -427,7 +428,7 @@ else:
     
     if not validation_errors:
         st.session_state.questions_valid = True
-        st.session_state.questions_data = df.to_dict('records')
+        st.session_state.questions_df = df
         st.success(f"✅ **Validation Passed!** {len(df)} questions ready")
         
         with st.expander("👀 Preview Questions"):
@@ -443,20 +444,21 @@ else:
     else:
         st.error("❌ Fix validation errors above")
         st.session_state.questions_valid = False
-        st.session_state.questions_data = []
+        st.session_state.questions_df = None
     
     # Remove file button
     if st.button("🗑️ Remove & Upload New", key="remove_csv"):
         st.session_state.csv_processed = False
         st.session_state.csv_df = None
+        st.session_state.csv_hash = None
         st.session_state.csv_name = None
         st.session_state.questions_valid = False
-        st.session_state.questions_data = []
+        st.session_state.questions_df = None
         st.rerun()
 
 # Get values for Step 3
 questions_valid = st.session_state.questions_valid
-questions_data = st.session_state.questions_data
+questions_df = st.session_state.questions_df
 
 st.markdown("")
 st.markdown("")
@@ -473,11 +475,11 @@ can_create = all([
     duration,
     access_code,
     questions_valid,
-    len(questions_data) > 0
+    questions_df is not None and len(questions_df) > 0
 ])
 
 if not can_create:
-    st.info("👆 Please complete Steps 1 and 2 above to enable test creation")
+    st.info("👆 Please complete and save Steps 1 and 2 above to enable test creation")
 else:
     st.success("✅ Ready to create test!")
 
@@ -503,7 +505,7 @@ if create_button and can_create and not st.session_state.get("test_created"):
                 "duration": int(duration),
                 "expiry_time": expiry_datetime,
                 "access_code": st.session_state.form_access_code.strip().upper(),
-                "total_questions": len(questions_data),
+                "total_questions": len(questions_df),
                 "status": "active"
             }
 
@@ -514,17 +516,20 @@ if create_button and can_create and not st.session_state.get("test_created"):
                 st.error("❌ Failed to create test")
                 st.stop()
 
-            questions_created = create_questions_batch(test_id, questions_data)
+            questions_created = create_questions_batch(test_id, questions_df)
 
             if not questions_created:
                 st.error("❌ Failed to upload questions")
                 st.stop()
+            
+            # New test must show up in the cached test list right away
+            cached_tests_by_teacher.clear()
         
             # ✅ SUCCESS STATE
             st.session_state.test_created = True
             st.session_state.created_test_id = test_id
             st.session_state.created_access_code = st.session_state.form_access_code
-            st.session_state.created_questions_count = len(questions_data)
+            st.session_state.created_questions_count = len(questions_df)
             st.session_state.created_expiry = expiry_datetime
 
             st.rerun()
@@ -11,13 +11,14 @@ Displays comprehensive test analytics with visualizations:
 import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
+from pathlib import Path
 from datetime import datetime, timezone
-import plotly.express as px
-import plotly.graph_objects as go
 from utils.auth import require_authentication, get_current_user_id
-from utils.firebase import get_tests_by_teacher, get_test_by_id, get_submissions_by_test, get_questions_by_test
+from utils.firebase_cached import (
+    cached_test, cached_tests_by_teacher, cached_submissions, cached_questions, clear_cached_reads
+)
 from utils.analytics import generate_comprehensive_analytics
-from utils.ai_insights import get_quick_insights
 
 # Protect this page
 require_authentication()
@@ -30,109 +31,142 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-
-/* =======================
-   GRID LAYOUT
-======================= */
-.risk-grid {
-    display: grid;
-    grid-template-columns: repeat(3, 1fr);
-    gap: 1rem;
-    margin: 1.5rem 0;
-}
-
-/* =======================
-   BASE METRIC CARD
-======================= */
-.metric-card {
-    background: white;
-    padding: 1.5rem;
-    border-radius: 12px;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-    border-left: 5px solid transparent;
-}
-
-/* =======================
-   COMPACT GRID CARD
-======================= */
-.metric-card.compact {
-    text-align: center;
-}
-
-.metric-card.compact h4 {
-    margin-bottom: 0.5rem;
-    font-size: 1rem;
-}
-
-.metric-card.compact h3 {
-    font-size: 2rem;
-    margin: 0.25rem 0;
-}
-
-.metric-card.compact p {
-    font-size: 0.9rem;
-    color: #555;
-}
-
-/* =======================
-   DETAILED STATUS CARD
-======================= */
-.metric-card.detailed {
-    text-align: left;
-    margin-bottom: 1.5rem;
-    border-left-color: var(--border-color);
-}
-
-.metric-card.detailed h2 {
-    margin-bottom: 1rem;
-}
-
-.metric-card.detailed p {
-    line-height: 1.6;
-}
-
-/* =======================
-   RECOMMENDATION BOX
-======================= */
-.recommendation {
-    background: #f8f9fa;
-    padding: 1rem;
-    border-radius: 8px;
-    margin-top: 1rem;
-}
-
-/* =======================
-   RISK COLORS
-======================= */
-.high-risk {
-    background: #f8d7da;
-    border-left-color: #dc3545;
-}
-
-.medium-risk {
-    background: #fff3cd;
-    border-left-color: #ffc107;
-}
-
-.low-risk {
-    background: #d4edda;
-    border-left-color: #28a745;
-}
-
-/* =======================
-   RESPONSIVE
-======================= */
-@media (max-width: 768px) {
-    .risk-grid {
-        grid-template-columns: 1fr;
-    }
-}
-
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS (read from disk once per process)
+@st.cache_resource
+def _dashboard_css() -> str:
+    css = (Path(__file__).resolve().parent.parent / "assets" / "dashboard.css").read_text()
+    return f"<style>\n{css}</style>"
+
+st.markdown(_dashboard_css(), unsafe_allow_html=True)
+
+# ========================================
+# CACHED DATA ACCESS
+# ========================================
+
+def _tests_index(teacher_id):
+    """
+    Teacher's tests plus the lookups the selector needs.
+
+    Reads through the shared cached_tests_by_teacher, so clearing that one
+    cache (as create_test does) is enough to show a new test here.
+
+    Returns:
+        tuple: (tests, test_ids, id_to_index, test_titles)
+    """
+    tests = cached_tests_by_teacher(teacher_id)
+    test_ids = [t['id'] for t in tests]
+    id_to_index = {tid: i for i, tid in enumerate(test_ids)}
+    test_titles = {t['id']: f"{t['title']} ({t['subject']})" for t in tests}
+    return tests, test_ids, id_to_index, test_titles
+
+
+def _submissions_signature(submissions):
+    """
+    Cheap cache key for a test's submissions.
+
+    Submissions come back newest first, so the count plus the latest
+    timestamp changes whenever a student submits.
+    """
+    latest = submissions[0].get('submitted_at') if submissions else None
+    return len(submissions), latest
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_analytics(test_id, sig, _questions, _submissions):
+    """
+    Analytics for a test, recomputed only when its submissions change.
+
+    Kept in memory only: a disk cache would outlive changes to the analytics
+    layout and leave student names and scores on local disk.
+    """
+    return generate_comprehensive_analytics(_questions, _submissions)
+
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
+def _cached_quick_insights(test_id, sig, _analytics):
+    """
+    AI insights for a test, so reruns don't repeat the LLM call.
+
+    Raises on failure: st.cache_data doesn't store exceptions, so a failed
+    call is retried next time instead of being served for an hour.
+    """
+    from utils.ai_insights import get_quick_insights
+    insights = get_quick_insights(_analytics)
+    if insights is None:
+        raise RuntimeError("AI insights unavailable")
+    return insights
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_html_report(test_id, sig, has_insights, test_title, test_subject, _analytics, _quick_insights):
+    """Downloadable HTML report, rebuilt only when the test's submissions change."""
+    from utils.html_report_generator import generate_html_report
+    return generate_html_report(
+        test_title=test_title,
+        test_subject=test_subject,
+        analytics=_analytics,
+        ai_insights=_quick_insights
+    )
+
+
+@st.cache_resource
+def _plotly():
+    """Import plotly on first chart render rather than on page load."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _build_gauge(readiness_score):
+    """Readiness gauge figure, built once per score."""
+    _, go = _plotly()
+    fig_gauge = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=readiness_score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Readiness Score"},
+        delta={'reference': 75},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "#28a745" if readiness_score >= 75 else ("#ffc107" if readiness_score >= 60 else "#dc3545")},
+            'steps': [
+                {'range': [0, 60], 'color': "#f8d7da"},
+                {'range': [60, 75], 'color': "#fff3cd"},
+                {'range': [75, 100], 'color': "#d4edda"}
+            ],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': 75
+            }
+        }
+    ))
+    fig_gauge.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20))
+    return fig_gauge
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _build_topic_bar(df_topics):
+    """Topic accuracy bar chart, built once per topic table."""
+    px, _ = _plotly()
+    fig_topics = px.bar(
+        df_topics,
+        x='Topic',
+        y='Accuracy (%)',
+        color='Accuracy (%)',
+        color_continuous_scale=['#dc3545', '#ffc107', '#28a745'],
+        range_color=[0, 100],
+        title="Topic Accuracy Overview"
+    )
+    fig_topics.add_hline(y=60, line_dash="dash", line_color="orange", annotation_text="Minimum Target (60%)")
+    fig_topics.update_layout(height=400)
+    return fig_topics
+
+
+def _clear_data_cache():
+    """Drop all cached Firestore reads so the next run fetches fresh data."""
+    clear_cached_reads()
 
 # ========================================
 # HEADER
@@ -149,7 +183,7 @@ st.markdown("")
 # ========================================
 
 teacher_id = get_current_user_id()
-tests = get_tests_by_teacher(teacher_id)
+tests, test_ids, id_to_index, test_titles = _tests_index(teacher_id)
 
 if not tests:
     st.info("📭 No tests created yet")
@@ -161,9 +195,6 @@ if not tests:
 if 'selected_test_id' not in st.session_state:
     st.session_state.selected_test_id = tests[0]['id']
 
-test_ids = [t['id'] for t in tests]
-test_titles = {t['id']: f"{t['title']} ({t['subject']})" for t in tests}
-
 col1, col2 = st.columns([3, 1])
 
 with col1:
@@ -171,13 +202,14 @@ with col1:
         "Select a test to analyze",
         options=test_ids,
         format_func=lambda x: test_titles[x],
-        index=test_ids.index(st.session_state.selected_test_id) if st.session_state.selected_test_id in test_ids else 0,
+        index=id_to_index.get(st.session_state.selected_test_id, 0),
         key="dashboard_test_selector"
     )
     st.session_state.selected_test_id = selected_test_id
 
 with col2:
     if st.button("🔄 Refresh Data", use_container_width=True):
+        _clear_data_cache()
         st.rerun()
 
 # ========================================
@@ -185,9 +217,9 @@ with col2:
 # ========================================
 
 with st.spinner("Loading test data..."):
-    test = get_test_by_id(selected_test_id)
-    submissions = get_submissions_by_test(selected_test_id)
-    questions = get_questions_by_test(selected_test_id)
+    test = cached_test(selected_test_id)
+    submissions = cached_submissions(selected_test_id)
+    questions = cached_questions(selected_test_id)
 
 st.markdown("")
 st.markdown("")
@@ -225,7 +257,8 @@ if len(submissions) == 0:
 # ========================================
 
 with st.spinner("Analyzing performance data..."):
-    analytics = generate_comprehensive_analytics(questions, submissions)
+    submissions_sig = _submissions_signature(submissions)
+    analytics = _cached_analytics(selected_test_id, submissions_sig, questions, submissions)
 
 if not analytics.get('has_data'):
     st.error("❌ Unable to generate analytics")
@@ -284,29 +317,7 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     # Readiness gauge
-    fig_gauge = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=readiness_score,
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': "Readiness Score"},
-        delta={'reference': 75},
-        gauge={
-            'axis': {'range': [None, 100]},
-            'bar': {'color': "#28a745" if readiness_score >= 75 else ("#ffc107" if readiness_score >= 60 else "#dc3545")},
-            'steps': [
-                {'range': [0, 60], 'color': "#f8d7da"},
-                {'range': [60, 75], 'color': "#fff3cd"},
-                {'range': [75, 100], 'color': "#d4edda"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'thickness': 0.75,
-                'value': 75
-            }
-        }
-    ))
-    fig_gauge.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20))
-    st.plotly_chart(fig_gauge, use_container_width=True)
+    st.plotly_chart(_build_gauge(readiness_score), use_container_width=True)
 
 with col2:
     st.markdown(
@@ -341,34 +352,22 @@ st.markdown("")
 
 st.markdown("### 📚 Topic Performance Analysis")
 
-topic_perf = analytics['topic_performance']
-
-# Create dataframe for visualization
-topic_data = []
-for topic, stats in topic_perf.items():
-    topic_data.append({
-        'Topic': topic,
-        'Accuracy (%)': stats['accuracy'],
-        'Correct': stats['correct'],
-        'Total Attempts': stats['total_attempts'],
-        'Status': '🟢 Strong' if stats['accuracy'] >= 75 else ('🟡 Moderate' if stats['accuracy'] >= 60 else '🔴 Weak')
-    })
-
-df_topics = pd.DataFrame(topic_data).sort_values('Accuracy (%)', ascending=False)
+# Topic table arrives pre-built and sorted (best first) from analytics
+df_topics = analytics['topic_table'].rename(columns={
+    'topic': 'Topic',
+    'accuracy': 'Accuracy (%)',
+    'correct': 'Correct',
+    'total_attempts': 'Total Attempts'
+})[['Topic', 'Accuracy (%)', 'Correct', 'Total Attempts']]
+
+accuracy = df_topics['Accuracy (%)'].to_numpy()
+status_codes = np.select([accuracy >= 75, accuracy >= 60], [2, 1], default=0)
+df_topics = df_topics.assign(
+    Status=pd.Categorical.from_codes(status_codes, ['🔴 Weak', '🟡 Moderate', '🟢 Strong'])
+)
 
 # Bar chart
-fig_topics = px.bar(
-    df_topics,
-    x='Topic',
-    y='Accuracy (%)',
-    color='Accuracy (%)',
-    color_continuous_scale=['#dc3545', '#ffc107', '#28a745'],
-    range_color=[0, 100],
-    title="Topic Accuracy Overview"
-)
-fig_topics.add_hline(y=60, line_dash="dash", line_color="orange", annotation_text="Minimum Target (60%)")
-fig_topics.update_layout(height=400)
-st.plotly_chart(fig_topics, use_container_width=True)
+st.plotly_chart(_build_topic_bar(df_topics[['Topic', 'Accuracy (%)']]), use_container_width=True)
 
 # Table
 st.dataframe(df_topics, use_container_width=True, hide_index=True)
@@ -420,20 +419,15 @@ st.markdown(
 # Detailed student table
 st.markdown("#### Student Performance Table")
 
-all_students = []
-for student in risk_data['high_risk']:
-    all_students.append({**student, 'risk': '🔴 High Risk'})
-for student in risk_data['medium_risk']:
-    all_students.append({**student, 'risk': '🟡 Medium Risk'})
-for student in risk_data['low_risk']:
-    all_students.append({**student, 'risk': '🟢 Low Risk'})
-
-df_students = pd.DataFrame(all_students)
-df_students = df_students.rename(columns={'name': 'Student', 'percentage': 'Score (%)', 'risk': 'Risk Level'})
-df_students['Score (%)'] = df_students['Score (%)'].apply(lambda x: f"{x:.1f}%")
-df_students = df_students[['Student', 'Score (%)', 'Risk Level']]
+students = risk_data['students']
+df_students = pd.DataFrame({
+    'Student': students['names'],
+    'Score (%)': students['percentages'],
+    'Risk Level': students['risk']
+})
 
-st.dataframe(df_students, use_container_width=True, hide_index=True)
+# Format at display time so the column stays numeric (and sorts as such)
+st.dataframe(df_students.style.format({'Score (%)': '{:.1f}%'}), use_container_width=True, hide_index=True)
 
 st.markdown("")
 st.markdown("")
@@ -444,70 +438,50 @@ st.markdown("")
 
 st.markdown("### 🤖 AI-Powered Insights")
 
-with st.spinner("Generating AI insights..."):
-    quick_insights = get_quick_insights(analytics)
-
-st.markdown("""
-<style>
-.insight-grid {
-    display: grid;
-    grid-template-columns: repeat(2, 1fr);
-    gap: 1.5rem;
-    margin: 1.5rem 0;
-}
-
-.insight-box {
-    background: #e7f3ff;
-    padding: 1.5rem;
-    border-radius: 12px;
-    border-left: 5px solid #0066cc;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-    line-height: 1.6;
-}
-
-.insight-box h4 {
-    margin-bottom: 0.75rem;
-    font-size: 1.1rem;
-    color: #0066cc;
-}
-
-.insight-box p {
-    margin: 0;
-    color: #333;
-    font-weight: 400;
-}
-
-@media (max-width: 768px) {
-    .insight-grid {
-        grid-template-columns: 1fr;
-    }
-}
-</style>
-""", unsafe_allow_html=True)
+# The LLM call only happens once the teacher asks for it (per submission set)
+if 'insights_requested' not in st.session_state:
+    st.session_state.insights_requested = set()
 
-st.markdown(
-    f"""
-    <div class="insight-grid">
-        <div class="insight-box">
-            <h4>📝 Summary</h4>
-            <p>{quick_insights.get('summary', 'AI insights unavailable')}</p>
-        </div>
-        <div class="insight-box">
-            <h4>⚠️ Areas of Concern</h4>
-            <p>{quick_insights.get('weaknesses', 'AI insights unavailable')}</p>
-        </div>
-        <div class="insight-box">
-            <h4>✅ Strengths</h4>
-            <p>{quick_insights.get('strengths', 'AI insights unavailable')}</p>
-        </div>
-        <div class="insight-box">
-            <h4>🎯 Action Items</h4>
-            <p>{quick_insights.get('action_items', 'AI insights unavailable')}</p>
+insights_key = (selected_test_id, submissions_sig)
+quick_insights = None
+
+if insights_key not in st.session_state.insights_requested:
+    st.caption("AI insights summarise this test's results using an external model.")
+    if st.button("🤖 Generate AI Insights"):
+        st.session_state.insights_requested.add(insights_key)
+
+if insights_key in st.session_state.insights_requested:
+    with st.spinner("Generating AI insights..."):
+        try:
+            quick_insights = _cached_quick_insights(selected_test_id, submissions_sig, analytics)
+        except RuntimeError:
+            # Error already shown; bring the button back so the teacher can retry
+            st.session_state.insights_requested.discard(insights_key)
+
+if quick_insights:
+    st.markdown(
+        f"""
+        <div class="insight-grid">
+            <div class="insight-box">
+                <h4>📝 Summary</h4>
+                <p>{quick_insights.get('summary', 'AI insights unavailable')}</p>
+            </div>
+            <div class="insight-box">
+                <h4>⚠️ Areas of Concern</h4>
+                <p>{quick_insights.get('weaknesses', 'AI insights unavailable')}</p>
+            </div>
+            <div class="insight-box">
+                <h4>✅ Strengths</h4>
+                <p>{quick_insights.get('strengths', 'AI insights unavailable')}</p>
+            </div>
+            <div class="insight-box">
+                <h4>🎯 Action Items</h4>
+                <p>{quick_insights.get('action_items', 'AI insights unavailable')}</p>
+            </div>
         </div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+        """,
+        unsafe_allow_html=True
+    )
 
 st.markdown("")
 st.markdown("")
@@ -525,14 +499,14 @@ col1, col2, col3 = st.columns(3)
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    from utils.html_report_generator import generate_html_report
-    from datetime import datetime, timezone
-    
-    html_report = generate_html_report(
-        test_title=test['title'],
-        test_subject=test['subject'],
-        analytics=analytics,
-        ai_insights=quick_insights
+    html_report = _cached_html_report(
+        selected_test_id,
+        submissions_sig,
+        quick_insights is not None,
+        test['title'],
+        test['subject'],
+        analytics,
+        quick_insights
     )
     
     st.download_button(
@@ -11,10 +11,12 @@ This page handles:
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_autorefresh import st_autorefresh
-from datetime import datetime, timedelta, timezone
 import time
-from utils.firebase import get_questions_by_test, get_test_by_id, create_submission
+import numpy as np
+from utils.firebase import get_test_by_id, create_submission
+from utils.firebase_cached import cached_exam_questions
 
 # Page configuration
 st.set_page_config(
@@ -24,44 +26,10 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+@st.cache_resource
+def _exam_css() -> str:
+    return """
 <style>
-    .timer-box {
-        position: fixed;
-        top: 80px;
-        right: 20px;
-        background: #fff;
-        padding: 1rem;
-        border-radius: 8px;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.15);
-        z-index: 999;
-        min-width: 150px;
-    }
-            
-    .timer-normal {
-        background: #f8f9fa;
-        border-radius: 14px;
-        padding: 1.2rem;
-        text-align: center;
-    }
-    
-    .timer-critical {
-        background: #f8d7da !important;
-        border: 2px solid #dc3545;
-    }
-    
-    .timer-warning {
-        background: #fff3cd !important;
-        border: 2px solid #ffc107;
-    }
-            
-    .timer-danger {
-        background: #f8d7da;
-        border-radius: 14px;
-        padding: 1.2rem;
-        text-align: center;
-    }
-    
     /* STRICT question card targeting */
     div[data-testid="stVerticalBlock"]:has(> div > .question-anchor) {
         background: white;
@@ -91,16 +59,79 @@ st.markdown("""
         border-radius: 4px;
         transition: width 0.3s;
     }
-    
-    @media (max-width: 768px) {
-        .timer-box {
-            position: static;
-            width: 100%;
-            margin-bottom: 1rem;
-        }
+</style>
+"""
+
+st.markdown(_exam_css(), unsafe_allow_html=True)
+
+# Answer options, in display order
+OPTION_KEYS = ('A', 'B', 'C', 'D')
+OPTION_FIELDS = ('option_a', 'option_b', 'option_c', 'option_d')
+OPTION_INDEX = {key: idx for idx, key in enumerate(OPTION_KEYS)}
+
+# Client-side countdown: styles live inside the iframe the component renders
+TIMER_TEMPLATE = """
+<style>
+    body { margin: 0; font-family: "Source Sans Pro", sans-serif; }
+    .timer-box {
+        background: #fff;
+        padding: 0.75rem 1rem;
+        border-radius: 8px;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.15);
+        text-align: center;
     }
+    .timer-box h3 { margin: 0 0 0.25rem 0; font-size: 1.5rem; }
+    .timer-critical { background: #f8d7da; border: 2px solid #dc3545; }
+    .timer-warning { background: #fff3cd; border: 2px solid #ffc107; }
 </style>
-""", unsafe_allow_html=True)
+<div id="timer" class="timer-box">
+    <h3 id="timer-clock"></h3>
+    <span id="timer-label">Time Remaining</span>
+</div>
+<script>
+    const endMs = __END_MS__;
+    const box = document.getElementById("timer");
+    const clock = document.getElementById("timer-clock");
+    const label = document.getElementById("timer-label");
+
+    function tick() {
+        const remaining = Math.max(0, Math.floor((endMs - Date.now()) / 1000));
+        const minutes = Math.floor(remaining / 60);
+        const seconds = String(remaining % 60).padStart(2, "0");
+
+        if (remaining < 60) {
+            box.className = "timer-box timer-critical";
+            clock.textContent = `⏰ ${minutes}:${seconds}`;
+            label.innerHTML = '<strong style="color:#dc3545;">TIME CRITICAL!</strong>';
+        } else if (remaining < 300) {
+            box.className = "timer-box timer-warning";
+            clock.textContent = `⏱️ ${minutes}:${seconds}`;
+            label.innerHTML = '<strong style="color:#ffc107;">5 min remaining</strong>';
+        } else {
+            box.className = "timer-box";
+            clock.textContent = `⏱️ ${minutes}:${seconds}`;
+            label.textContent = "Time Remaining";
+        }
+    }
+
+    tick();
+    setInterval(tick, 1000);
+</script>
+"""
+
+# Longest gap between server reruns while the exam is open
+TIMER_SYNC_MS = 30000
+
+
+def _timer_html(end_ms: int) -> str:
+    """Countdown widget HTML for an exam ending at end_ms (epoch milliseconds)."""
+    return TIMER_TEMPLATE.replace("__END_MS__", str(end_ms))
+
+
+def _jump_to_question():
+    """Navigator callback: move to the question picked in the navigator."""
+    st.session_state.test_session['current_question'] = st.session_state.question_navigator
+
 
 # ========================================
 # CHECK TEST SESSION
@@ -127,23 +158,50 @@ test_id = session['test_id']
 # Load questions (cache in session state)
 if 'questions' not in session:
     with st.spinner("Loading questions..."):
-        questions = get_questions_by_test(test_id)
+        questions = cached_exam_questions(test_id)
         if not questions:
+            # Don't keep an empty (possibly failed) read around for an hour
+            cached_exam_questions.clear()
             st.error("❌ No questions found for this test")
             st.stop()
         session['questions'] = questions
 
+# Columns used for grading, pulled out once per session (parallel to questions):
+# answer keys as one ASCII byte each, topics as small integer codes
+if 'q_ids' not in session:
+    session['q_ids'] = [q['id'] for q in session['questions']]
+    session['q_correct_codes'] = np.frombuffer(
+        ''.join(q['correct_option'] for q in session['questions']).encode('ascii'),
+        dtype=np.uint8
+    )
+    topic_names, topic_codes = np.unique(
+        [q['topic'] for q in session['questions']], return_inverse=True
+    )
+    session['q_topic_names'] = topic_names.tolist()
+    session['q_topic_codes'] = topic_codes.astype(np.int32)
+
 questions = session['questions']
 total_questions = len(questions)
 
+# Answers and status masks are indexed by question position (resized if
+# the stored question count doesn't match what was loaded)
+if len(session['answers']) != total_questions:
+    session['answers'] = (session['answers'] + [None] * total_questions)[:total_questions]
+if len(session.get('visited', b'')) != total_questions:
+    session['visited'] = bytearray(total_questions)
+    session['answered'] = bytearray(
+        answer is not None for answer in session['answers']
+    )
+
 # ========================================
 # TIMER CALCULATION
 # ========================================
 
-start_time = session['start_time']
-duration_seconds = session['duration'] * 60
-end_time = start_time + timedelta(seconds=duration_seconds)
-time_remaining = (end_time - datetime.now(timezone.utc)).total_seconds()
+# Deadline as epoch seconds, worked out once per session
+if 'end_ts' not in session:
+    session['end_ts'] = session['start_time'].timestamp() + session['duration'] * 60
+
+time_remaining = session['end_ts'] - time.time()
 
 # Check if time has expired
 if time_remaining <= 0:
@@ -152,17 +210,6 @@ if time_remaining <= 0:
     st.switch_page("pages/submit_test.py")
     st.stop()
 
-# Timer status
-timer_class = "timer-box"
-if time_remaining < 60:  # Last minute - critical
-    timer_class = "timer-box timer-critical"
-elif time_remaining < 300:  # Last 5 minutes - warning
-    timer_class = "timer-box timer-warning"
-
-# Format time remaining
-minutes = int(time_remaining // 60)
-seconds = int(time_remaining % 60)
-
 # ========================================
 # HEADER WITH TIMER
 # ========================================
@@ -174,29 +221,9 @@ with col1:
     st.markdown(f"**Subject:** {session['test_subject']} | **Student:** {session['student_name']}")
 
 with col2:
-    if time_remaining < 60:
-        timer_html = f"""
-        <div class="{timer_class}">
-            <h3>⏰ {minutes}:{seconds:02d}</h3>
-            <strong style="color:#dc3545;">TIME CRITICAL!</strong>
-        </div>
-        """
-    elif time_remaining < 300:
-        timer_html = f"""
-        <div class="{timer_class}">
-            <h3>⏱️ {minutes}:{seconds:02d}</h3>
-            <strong style="color:#ffc107;">5 min remaining</strong>
-        </div>
-        """
-    else:
-        timer_html = f"""
-        <div class="{timer_class}">
-            <h3>⏱️ {minutes}:{seconds:02d}</h3>
-            <span>Time Remaining</span>
-        </div>
-        """
-
-    st.markdown(timer_html, unsafe_allow_html=True)
+    # Countdown ticks in the browser; the server only reruns to sync/expire
+    end_ms = int(session['end_ts'] * 1000)
+    components.html(_timer_html(end_ms), height=110)
 
 st.markdown("")
 st.markdown("")
@@ -205,7 +232,7 @@ st.markdown("")
 # PROGRESS BAR
 # ========================================
 
-answered_count = len(session['answers'])
+answered_count = sum(session['answered'])
 progress_percentage = (answered_count / total_questions) * 100
 
 st.markdown(f"**Progress:** {answered_count}/{total_questions} questions answered ({progress_percentage:.0f}%)")
@@ -228,7 +255,7 @@ current_question = questions[current_idx]
 question_id = current_question['id']
 
 # Mark as visited
-session['visited_questions'].add(question_id)
+session['visited'][current_idx] = 1
 
 # =========================
 # QUESTION CARD (CORRECT)
@@ -253,25 +280,21 @@ with st.container():
 
     st.markdown(f"### {current_question['question']}")
 
-    options = {
-        'A': current_question['option_a'],
-        'B': current_question['option_b'],
-        'C': current_question['option_c'],
-        'D': current_question['option_d']
-    }
+    options = tuple(current_question[field] for field in OPTION_FIELDS)
 
-    current_answer = session['answers'].get(question_id)
+    current_answer = session['answers'][current_idx]
 
     selected_option = st.radio(
         "Select your answer:",
-        options=list(options.keys()),
-        format_func=lambda x: f"{x}. {options[x]}",
-        index=list(options.keys()).index(current_answer) if current_answer else None,
+        options=OPTION_KEYS,
+        format_func=lambda x: f"{x}. {options[OPTION_INDEX[x]]}",
+        index=OPTION_INDEX.get(current_answer),
         key=f"question_{question_id}"
     )
 
     if selected_option:
-        session['answers'][question_id] = selected_option
+        session['answers'][current_idx] = selected_option
+        session['answered'][current_idx] = 1
 
 st.markdown("")
 st.markdown("")
@@ -313,31 +336,30 @@ st.markdown("")
 with st.expander("🗺️ Question Navigator"):
     st.markdown("**Jump to any question:**")
     
-    # Create grid of question buttons
-    cols = st.columns(10)
+    # One radio for the whole grid instead of a button per question
+    answered = session['answered']
+    visited = session['visited']
+    
+    def _nav_label(idx):
+        if idx == current_idx:
+            return f"➡️ {idx + 1}"
+        if answered[idx]:
+            return f"✅ {idx + 1}"
+        if visited[idx]:
+            return f"👁️ {idx + 1}"
+        return f"⭕ {idx + 1}"
     
-    for idx, question in enumerate(questions):
-        col_idx = idx % 10
-        with cols[col_idx]:
-            q_id = question['id']
-            
-            # Determine button style
-            if q_id in session['answers']:
-                button_label = f"✅ {idx + 1}"
-                button_type = "secondary"
-            elif q_id in session['visited_questions']:
-                button_label = f"👁️ {idx + 1}"
-                button_type = "secondary"
-            else:
-                button_label = f"⭕ {idx + 1}"
-                button_type = "secondary"
-            
-            if idx == current_idx:
-                button_label = f"➡️ {idx + 1}"
-            
-            if st.button(button_label, key=f"nav_{idx}", use_container_width=True):
-                session['current_question'] = idx
-                st.rerun()
+    # Keep the selection in step with Previous/Next navigation
+    st.session_state.question_navigator = current_idx
+    st.radio(
+        "Jump to any question",
+        options=range(total_questions),
+        format_func=_nav_label,
+        horizontal=True,
+        key="question_navigator",
+        on_change=_jump_to_question,
+        label_visibility="collapsed"
+    )
     
     st.markdown("")
     st.markdown("")
@@ -365,8 +387,9 @@ with st.expander("🗺️ Question Navigator"):
 # AUTO-REFRESH FOR TIMER
 # ========================================
 
-# Rerun every second to update timer
-st_autorefresh(interval=1000, key="exam_timer")
+# The countdown itself runs in the browser; rerun every 30s to stay in sync,
+# or just after the deadline so the test is auto-submitted on time
+st_autorefresh(interval=int(min(TIMER_SYNC_MS, time_remaining * 1000 + 500)), key="exam_timer")
 # st.rerun()
 
 st.caption("comPASS v1.0 | Exam Interface")
\ No newline at end of file
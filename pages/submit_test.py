@@ -10,8 +10,12 @@ This page handles:
 """
 
 import streamlit as st
-from datetime import datetime, timezone, timedelta
+import numpy as np
+import time
+import uuid
+from datetime import datetime, timezone
 from utils.firebase import create_submission
+from utils.firebase_cached import invalidate_submission_reads
 
 # Page configuration
 st.set_page_config(
@@ -41,9 +45,8 @@ if session.get('submitted', False):
 # SUBMISSION CONFIRMATION
 # ========================================
 
-questions = session['questions']
-total_questions = len(questions)
-answered_count = len(session['answers'])
+total_questions = len(session['q_ids'])
+answered_count = total_questions - session['answers'].count(None)
 unanswered_count = total_questions - answered_count
 
 st.title("✅ Submit Test")
@@ -93,16 +96,19 @@ with col1:
     if st.button("🔙 Back to Test", use_container_width=True):
         # Check if time remaining
         session = st.session_state.test_session
-        start_time = session['start_time']
-        duration_seconds = session['duration'] * 60
-        end_time = start_time + timedelta(seconds=duration_seconds)
-        time_remaining = (end_time - datetime.now(timezone.utc)).total_seconds()
+        end_ts = session.get('end_ts', session['start_time'].timestamp() + session['duration'] * 60)
+        time_remaining = end_ts - time.time()
         
         if time_remaining <= 0:
             st.error("⏰ Time expired. Cannot return to test.")
             st.caption("click the confirmation box and submit your test.")
             st.stop()
         
+        # Answers may change, so grade again on the next submit; the regraded
+        # payload gets a new document ID and a fresh retry backoff, so it can
+        # never be mistaken for an earlier attempt that may have landed
+        for key in ('pending_submission', 'submission_doc_id', 'submit_attempts', 'last_attempt_ts'):
+            session.pop(key, None)
         st.switch_page("pages/exam_interface.py")
 
 with col2:
@@ -117,56 +123,93 @@ with col2:
 # PROCESS SUBMISSION
 # ========================================
 
-if submit_final and confirm_submit:
+def _request_retry():
+    """Retry button callback: ask the next run to resend the pending submission."""
+    st.session_state.retry_submission = True
+
+
+def _retry_button():
+    st.button("🔄 Retry Submission", use_container_width=True, key="retry_submission_btn", on_click=_request_retry)
+
+
+retry_requested = st.session_state.pop('retry_submission', False)
+
+if (submit_final and confirm_submit) or retry_requested:
+    # Back off between attempts (1s, 2s, 4s, ... capped at a minute)
+    attempts = session.get('submit_attempts', 0)
+    backoff = min(60, 2 ** attempts) if attempts else 0
+    since_last = time.time() - session.get('last_attempt_ts', 0)
+    if since_last < backoff:
+        st.warning(f"⏳ Please wait {int(backoff - since_last) + 1} seconds before retrying.")
+        _retry_button()
+        st.stop()
+    
     with st.spinner("Grading your test..."):
-        # Calculate score
-        correct_count = 0
-        topic_scores = {}  # topic -> {'correct': 0, 'total': 0}
-        
-        for question in questions:
-            q_id = question['id']
-            correct_option = question['correct_option']
-            student_answer = session['answers'].get(q_id)
+        # Grade once; retries resend the same payload to the same document ID
+        if 'pending_submission' not in session:
+            # Grade every question in one vectorized pass
+            # Both sides are single uppercase ASCII bytes: correct_option is
+            # normalized at upload and answers come from OPTION_KEYS ('A'-'D');
+            # unanswered questions become ' ' and never match
+            answer_codes = np.frombuffer(
+                ''.join(answer or ' ' for answer in session['answers']).encode('ascii'),
+                dtype=np.uint8
+            )
+            correct = answer_codes == session['q_correct_codes']
             
-            # Topic tracking
-            topic = question['topic']
-            if topic not in topic_scores:
-                topic_scores[topic] = {'correct': 0, 'total': 0}
-            topic_scores[topic]['total'] += 1
+            topic_codes = session['q_topic_codes']
+            n_topics = len(session['q_topic_names'])
+            per_topic_correct = np.bincount(topic_codes[correct], minlength=n_topics)
+            per_topic_total = np.bincount(topic_codes, minlength=n_topics)
             
-            # Check if correct
-            if student_answer and student_answer.upper() == correct_option.upper():
-                correct_count += 1
-                topic_scores[topic]['correct'] += 1
+            correct_count = int(correct.sum())
+            topic_scores = {
+                topic: {'correct': int(n_correct), 'total': int(n_total)}
+                for topic, n_correct, n_total in zip(session['q_topic_names'], per_topic_correct, per_topic_total)
+            }
+        
+            # Calculate percentage
+            percentage = (correct_count / total_questions) * 100 if total_questions > 0 else 0
         
-        # Calculate percentage
-        percentage = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+            # Calculate time taken
+            start_time = session['start_time']
+            time_taken = int((datetime.now(timezone.utc) - start_time).total_seconds())
         
-        # Calculate time taken
-        start_time = session['start_time']
-        time_taken = int((datetime.now(timezone.utc) - start_time).total_seconds())
+            # ✅ STORE time_taken in session BEFORE creating submission
+            session['time_taken'] = time_taken
+            session['score'] = correct_count
+            session['percentage'] = percentage
+            session['topic_scores'] = topic_scores
         
-        # ✅ STORE time_taken in session BEFORE creating submission
-        session['time_taken'] = time_taken
-        session['score'] = correct_count
-        session['percentage'] = percentage
-        session['topic_scores'] = topic_scores
+            # Prepare submission data
+            submission_data = {
+                'test_id': session['test_id'],
+                'student_name': session['student_name'],
+                # Stored by question ID, as analytics expects
+                'answers': {
+                    q_id: answer
+                    for q_id, answer in zip(session['q_ids'], session['answers'])
+                    if answer is not None
+                },
+                'score': correct_count,
+                'percentage': round(percentage, 2),
+                'total_questions': total_questions,
+                'time_taken': time_taken
+            }
         
-        # Prepare submission data
-        submission_data = {
-            'test_id': session['test_id'],
-            'student_name': session['student_name'],
-            'answers': session['answers'],
-            'score': correct_count,
-            'percentage': round(percentage, 2),
-            'total_questions': total_questions,
-            'time_taken': time_taken
-        }
+            session['pending_submission'] = submission_data
+            session.setdefault('submission_doc_id', uuid.uuid4().hex)
         
-        # Save to Firestore
-        submission_id = create_submission(submission_data)
+        session['submit_attempts'] = attempts + 1
+        session['last_attempt_ts'] = time.time()
+        
+        # Save to Firestore (create_submission stamps submitted_at, so send a copy)
+        submission_id = create_submission(dict(session['pending_submission']), session['submission_doc_id'])
         
         if submission_id:
+            # Written first, then drop the cached counts/submissions it makes stale
+            invalidate_submission_reads()
+            
             st.success("✅ Test submitted successfully!")
             
             # Store submission ID and mark as submitted
@@ -180,7 +223,6 @@ if submit_final and confirm_submit:
             st.switch_page("pages/test_results.py")
         else:
             st.error("❌ Failed to submit test. Please try again or contact your teacher.")
-            if st.button("🔄 Retry Submission", use_container_width=True):
-                st.rerun()
+            _retry_button()
 
 st.caption("comPASS v1.0 | Test Submission")
\ No newline at end of file
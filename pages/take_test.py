@@ -10,7 +10,8 @@ This page handles:
 
 import streamlit as st
 from datetime import datetime, timezone
-from utils.firebase import get_test_by_id, validate_access_code
+from utils.firebase import validate_access_code
+from utils.firebase_cached import cached_test
 import streamlit.components.v1 as components
 
 # Page configuration
@@ -56,42 +57,37 @@ st.markdown("""
 # GET TEST ID (SESSION FIRST, URL SECOND)
 # ========================================
 
-query_params = st.query_params
+# 1️⃣ Prefer session_state (navigation inside app); already normalized
+test_id = st.session_state.get("active_test_id")
 
-test_id = None
-
-# 1️⃣ Prefer session_state (navigation inside app)
-if "active_test_id" in st.session_state:
-    test_id = st.session_state["active_test_id"]
-
-# 2️⃣ Fallback to URL param (direct link / refresh)
-elif "id" in query_params:
-    test_id = query_params.get("id")
+# 2️⃣ Fallback to URL param (direct link / refresh), only until it's frozen
+if not test_id:
+    test_id = st.query_params.get("id")
     if isinstance(test_id, list):
         test_id = test_id[0]
-
-if not test_id or not str(test_id).strip():
-    st.error("❌ Invalid test link")
-    st.markdown("""
-    ### No Test ID Provided
     
-    Please make sure you're using the complete test link shared by your teacher.
+    if not test_id or not str(test_id).strip():
+        st.error("❌ Invalid test link")
+        st.markdown("""
+        ### No Test ID Provided
+        
+        Please make sure you're using the complete test link shared by your teacher.
+        
+        **Expected format:**
+        `https://your-app.hf.space/take_test?id=TEST_ID_HERE`
+        """)
+        st.stop()
     
-    **Expected format:**
-    `https://your-app.hf.space/take_test?id=TEST_ID_HERE`
-    """)
-    st.stop()
-
-# ✅ Freeze it for rest of page
-test_id = test_id.strip()
-st.session_state["active_test_id"] = test_id
+    # ✅ Freeze it for the rest of the session
+    test_id = str(test_id).strip()
+    st.session_state["active_test_id"] = test_id
 
 # ========================================
 # FETCH TEST DETAILS
 # ========================================
 
 with st.spinner("Loading test..."):
-    test = get_test_by_id(test_id)
+    test = cached_test(test_id)
 
 if not test:
     st.error("❌ Test not found")
@@ -234,10 +230,12 @@ if submit_access:
     else:
         with st.spinner("Verifying access code..."):
             # Validate access code
-            is_valid = validate_access_code(test_id, access_code)
+            # Checked against the test doc loaded above, no second read
+            is_valid = validate_access_code(test_id, access_code, test=test)
             
             if is_valid:
                 # Create test session
+                start_time = datetime.now(timezone.utc)
                 st.session_state.test_session = {
                     'test_id': test_id,
                     'student_name': student_name.strip(),
@@ -245,10 +243,12 @@ if submit_access:
                     'test_subject': test['subject'],
                     'total_questions': test['total_questions'],
                     'duration': test['duration'],
-                    'start_time': datetime.now(timezone.utc),
+                    'start_time': start_time,
+                    'end_ts': start_time.timestamp() + test['duration'] * 60,  # epoch seconds
                     'current_question': 0,
-                    'answers': {},  # question_id: selected_option
-                    'visited_questions': set()
+                    'answers': [None] * test['total_questions'],  # selected option per question index
+                    'visited': bytearray(test['total_questions']),  # 1 per question index once seen
+                    'answered': bytearray(test['total_questions'])  # 1 per question index once answered
                 }
                 
                 st.success("✅ Access granted!")
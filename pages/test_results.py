@@ -11,7 +11,19 @@ This page displays:
 
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
+import html
+import bisect
+from pathlib import Path
+from utils.ai_insights import stream_student_advice
+
+# Score bands as (lower bound %, css class, emoji, message), ascending
+SCORE_BANDS = [
+    (0, "score-poor", "📉", "Needs Improvement"),
+    (50, "score-average", "📈", "Fair Performance"),
+    (65, "score-good", "👍", "Good Job!"),
+    (80, "score-excellent", "🏆", "Excellent Performance!"),
+]
+_SCORE_BAND_FLOORS = [band[0] for band in SCORE_BANDS]
 
 # Page configuration
 st.set_page_config(
@@ -20,79 +32,34 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-/* ===============================
-   RESULT / INSIGHT CARD FIX
-   =============================== */
-
-/* Style the container itself */
-.result-card {
-    background: white;
-    padding: 2rem;
-    border-radius: 14px;
-    box-shadow: 0 6px 18px rgba(0,0,0,0.06);
-    margin: 1.5rem 0;
-}
-
-/* Score color modifiers */
-.score-excellent { border-left: 6px solid #28a745; background: #d4edda; }
-.score-good { border-left: 6px solid #17a2b8; background: #d1ecf1; }
-.score-average { border-left: 6px solid #ffc107; background: #fff3cd; }
-.score-poor { border-left: 6px solid #dc3545; background: #f8d7da; }
-
-/* Metric block */
-.metric-large {
-    text-align: center;
-    padding: 1.5rem;
-}
-
-.metric-large h1 {
-    font-size: 3.5rem;
-    margin: 0;
-}
-
-.result-content {
-    display: flex;                 /* side by side */
-    gap: 2rem;
-    align-items: right;           /* vertical alignment */
-}
-
-/* Left block */
-.metric-large {
-    text-align: center;              /* left aligned content */
-    min-width: 160px;
-}
-
-/* Right block (message) */
-.result-content > div:last-child {
-    text-align: left;             /* right aligned text */
-    flex: 1;                       /* take remaining space */
-}
-
-/* AI Insight card */
-.insight-card {
-    background: #e7f3ff;
-    padding: 1.5rem;
-    border-radius: 12px;
-    border-left: 5px solid #0066cc;
-    ont-family: system-ui, -apple-system, sans-serif;
-    line-height: 1.6;
-    font-weight: 400;              /* NORMAL text */
-    color: #1f2937;                /* softer dark */
-}
-            
-.insight-card strong {
-    font-weight: 300;              /* not 700 */
-}
-
-.insight-card br {
-    margin-bottom: 0.5rem;
-}
-
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS (read from disk once per process)
+@st.cache_resource
+def _results_css() -> str:
+    css = (Path(__file__).resolve().parent.parent / "assets" / "test_results.css").read_text()
+    return f"<style>\n{css}</style>"
+
+st.markdown(_results_css(), unsafe_allow_html=True)
+
+# ========================================
+# CACHED RENDERING
+# ========================================
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _result_card_html(percentage, score, total, time_taken, score_class, emoji, message) -> str:
+    """Result card markup; identical results reuse the formatted HTML."""
+    return f"""
+    <div class="result-card {score_class}">
+        <div class="result-content">
+            <div class="metric-large">
+            <h1 style="font-size: 3.5rem; margin: 0; padding: 0">{emoji}</h1>
+            <h1 style="font-size: 1.5rem; margin: 0;">{message}</h1>
+            <h1 style="font-size: 2.5rem; margin: 0.5rem 0;">{percentage:.1f}%</h1>
+            <h3 style="font-size: 1.5rem; margin: 0; padding: 0">{score}/{total}</h3>
+            <p><strong>Time Taken:</strong> {time_taken // 60} minutes
+            {time_taken % 60} seconds</p>
+
+    </div>
+    """
 
 # ========================================
 # CHECK TEST SESSION
@@ -128,40 +95,14 @@ total = session['total_questions']
 percentage = session['percentage']
 
 # Determine score category
-if percentage >= 80:
-    score_class = "score-excellent"
-    emoji = "🏆"
-    message = "Excellent Performance!"
-elif percentage >= 65:
-    score_class = "score-good"
-    emoji = "👍"
-    message = "Good Job!"
-elif percentage >= 50:
-    score_class = "score-average"
-    emoji = "📈"
-    message = "Fair Performance"
-else:
-    score_class = "score-poor"
-    emoji = "📉"
-    message = "Needs Improvement"
+score_class, emoji, message = SCORE_BANDS[bisect.bisect_right(_SCORE_BAND_FLOORS, percentage) - 1][1:]
 
 # ========================================
 # RESULT CARD
 # ========================================
+time_taken = session.get('time_taken', 0)
 st.markdown(
-    f"""
-    <div class="result-card {score_class}">
-        <div class="result-content">
-            <div class="metric-large">
-            <h1 style="font-size: 3.5rem; margin: 0; padding: 0">{emoji}</h1>
-            <h1 style="font-size: 1.5rem; margin: 0;">{message}</h1>
-            <h1 style="font-size: 2.5rem; margin: 0.5rem 0;">{percentage:.1f}%</h1>
-            <h3 style="font-size: 1.5rem; margin: 0; padding: 0">{score}/{total}</h3>
-            <p><strong>Time Taken:</strong> {session.get('time_taken', 0) // 60} minutes
-            {session.get('time_taken', 0) % 60} seconds</p>
-
-    </div>
-    """,
+    _result_card_html(percentage, score, total, time_taken, score_class, emoji, message),
     unsafe_allow_html=True
 )
 
@@ -177,37 +118,40 @@ st.markdown("### 📊 Topic-Wise Performance")
 topic_scores = session.get('topic_scores', {})
 
 if topic_scores:
-    # Prepare data for display
-    topic_data = []
+    # Static table built straight from topic_scores (no DataFrame / grid widget)
+    topic_rows = []
     weak_topics = []
     
     for topic, scores in topic_scores.items():
         correct = scores['correct']
         total_q = scores['total']
         topic_pct = (correct / total_q * 100) if total_q > 0 else 0
+        status = '✅ Strong' if topic_pct >= 70 else ('⚠️ Average' if topic_pct >= 50 else '❌ Weak')
         
-        topic_data.append({
-            'Topic': topic,
-            'Correct': correct,
-            'Total': total_q,
-            'Percentage': topic_pct,
-            'Status': '✅ Strong' if topic_pct >= 70 else ('⚠️ Average' if topic_pct >= 50 else '❌ Weak')
-        })
+        topic_rows.append((topic_pct, topic, correct, total_q, status))
         
         # Identify weak topics (< 60%)
         if topic_pct < 60:
             weak_topics.append(topic)
     
     # Sort by percentage descending
-    topic_data.sort(key=lambda x: x['Percentage'], reverse=True)
-    
-    # Display as dataframe
-    df = pd.DataFrame(topic_data)
+    topic_rows.sort(key=lambda row: row[0], reverse=True)
     
-    # Format percentage
-    df['Percentage'] = df['Percentage'].apply(lambda x: f"{x:.1f}%")
+    rows_html = "".join(
+        f"<tr><td>{html.escape(str(topic))}</td><td>{correct}</td><td>{total_q}</td>"
+        f"<td>{topic_pct:.1f}%</td><td>{status}</td></tr>"
+        for topic_pct, topic, correct, total_q, status in topic_rows
+    )
     
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.markdown(
+        f"""
+        <table class="topic-table">
+            <thead><tr><th>Topic</th><th>Correct</th><th>Total</th><th>Percentage</th><th>Status</th></tr></thead>
+            <tbody>{rows_html}</tbody>
+        </table>
+        """,
+        unsafe_allow_html=True
+    )
     
     st.markdown("")
     st.markdown("")
@@ -240,84 +184,91 @@ st.markdown("### 🤖 AI-Powered Personalized Advice")
 student_weak_topics = [topic for topic, scores in topic_scores.items() 
                         if (scores['correct'] / scores['total'] * 100) < 60] if topic_scores else []
 
-with st.spinner("Generating personalized advice..."):
-    from utils.ai_insights import get_student_advice
+# Generated once per session; reruns read it back from session state.
+# Streamed so the first words show while the rest is generated, then
+# replaced by the styled card. The prompt carries the student's name, so
+# responses are effectively cached per student and the real score is sent.
+if 'ai_advice' not in session:
+    advice_slot = st.empty()
+    with advice_slot.container():
+        streamed = st.write_stream(stream_student_advice(
+            session['student_name'],
+            percentage,
+            student_weak_topics
+        ))
+    advice_slot.empty()
+    session['ai_advice'] = streamed.strip() if isinstance(streamed, str) else None
+ai_advice = session['ai_advice']
+
+if ai_advice:
+    # Escape HTML and convert markdown to basic HTML
+    advice_html = ai_advice.replace('\n', '<br/>').replace('**', '<strong>')
     
-    ai_advice = get_student_advice(
-        student_name=session['student_name'],
-        percentage=percentage,
-        weak_topics=student_weak_topics
+    st.markdown(
+        f"""
+        <div class="insight-card">
+            {advice_html}
+        </div>
+        """,
+        unsafe_allow_html=True
     )
     
-    if ai_advice:
-        # Escape HTML and convert markdown to basic HTML
-        advice_html = ai_advice.replace('\n', '<br/>').replace('**', '<strong>')
-        
-        st.markdown(
-            f"""
-            <div class="insight-card">
-                {advice_html}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-        
+else:
+    # Fallback advice if AI is unavailable
+    if percentage >= 80:
+        fallback = """
+        <strong>Great work!</strong> Your performance indicates strong understanding.<br/><br/>
+        To maintain this level:<br/>
+        • Keep practicing regularly<br/>
+        • Review challenging concepts periodically<br/>
+        • Help other students to reinforce your knowledge
+        """
+    elif percentage >= 65:
+        fallback = """
+        <strong>Good effort!</strong> You have a solid foundation.<br/><br/>
+        To improve further:<br/>
+        • Focus on the weak topics identified above<br/>
+        • Practice more questions in those areas<br/>
+        • Seek clarification on confusing concepts
+        """
+    elif percentage >= 50:
+        fallback = """
+        <strong>You're on the right track,</strong> but there's room for improvement.<br/><br/>
+        Action plan:<br/>
+        • Dedicate extra time to weak topics<br/>
+        • Break down complex topics into smaller parts<br/>
+        • Use multiple study resources<br/>
+        • Practice regularly
+        """
     else:
-        # Fallback advice if AI is unavailable
-        if percentage >= 80:
-            fallback = """
-            <strong>Great work!</strong> Your performance indicates strong understanding.<br/><br/>
-            To maintain this level:<br/>
-            • Keep practicing regularly<br/>
-            • Review challenging concepts periodically<br/>
-            • Help other students to reinforce your knowledge
-            """
-        elif percentage >= 65:
-            fallback = """
-            <strong>Good effort!</strong> You have a solid foundation.<br/><br/>
-            To improve further:<br/>
-            • Focus on the weak topics identified above<br/>
-            • Practice more questions in those areas<br/>
-            • Seek clarification on confusing concepts
-            """
-        elif percentage >= 50:
-            fallback = """
-            <strong>You're on the right track,</strong> but there's room for improvement.<br/><br/>
-            Action plan:<br/>
-            • Dedicate extra time to weak topics<br/>
-            • Break down complex topics into smaller parts<br/>
-            • Use multiple study resources<br/>
-            • Practice regularly
-            """
-        else:
-            fallback = """
-            <strong>Immediate attention needed.</strong> Your score indicates gaps in understanding.<br/><br/>
-            Urgent action plan:<br/>
-            • Speak with your teacher immediately<br/>
-            • Create a structured revision schedule<br/>
-            • Focus on fundamentals first<br/>
-            • Consider additional tutoring or study groups<br/>
-            • Don't be discouraged - consistent effort will improve your scores
-            """
-        
-        components.html(
-            f"""
-            <style>
-            .insight-card {{
-                background: #e7f3ff;
-                padding: 1.5rem;
-                border-radius: 12px;
-                border-left: 5px solid #0066cc;
-                font-family: system-ui, -apple-system, sans-serif;
-                line-height: 1.6;
-            }}
-            </style>
-            <div class="insight-card">
-                {fallback}
-            </div>
-            """,
-            height=400
-        )
+        fallback = """
+        <strong>Immediate attention needed.</strong> Your score indicates gaps in understanding.<br/><br/>
+        Urgent action plan:<br/>
+        • Speak with your teacher immediately<br/>
+        • Create a structured revision schedule<br/>
+        • Focus on fundamentals first<br/>
+        • Consider additional tutoring or study groups<br/>
+        • Don't be discouraged - consistent effort will improve your scores
+        """
+    
+    components.html(
+        f"""
+        <style>
+        .insight-card {{
+            background: #e7f3ff;
+            padding: 1.5rem;
+            border-radius: 12px;
+            border-left: 5px solid #0066cc;
+            font-family: system-ui, -apple-system, sans-serif;
+            line-height: 1.6;
+        }}
+        </style>
+        <div class="insight-card">
+            {fallback}
+        </div>
+        """,
+        height=400
+    )
 
 # ========================================
 # NEXT STEPS
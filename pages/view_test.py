@@ -7,11 +7,20 @@ This page displays:
 - Actions: View analytics, Download report, View details
 """
 import streamlit as st
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
 import pandas as pd
 from utils.auth import require_authentication, get_current_user_id, get_user_display_name
-from utils.firebase import get_tests_by_teacher, get_submission_count, get_test_by_id
+from utils.firebase_cached import (
+    cached_tests_by_teacher, cached_submission_counts,
+    cached_questions, cached_submissions, clear_cached_reads,
+)
 import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Protect this page - require login
 require_authentication()
@@ -24,6 +33,51 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
+# Tests rendered per page in the card/table views
+TESTS_PAGE_SIZE = 20
+
+# Shareable student link, completed with the test ID
+TEST_LINK_BASE = "https://rasheedmrandroid-compass.hf.space/take_test?id="
+
+# Card markup for the Cards view, filled per test with str.format_map
+CARD_TEMPLATE = """
+<div class="test-card">
+    <div class="test-header">
+        <div class="test-title">{title}</div>
+        <div class="status {_status_class}">● {_status}</div>
+    </div>
+    <div class="test-meta">
+        {subject} • {total_questions} Questions
+    </div>
+    <div class="test-grid">
+        <div class="meta-box">
+            Duration
+            <strong>{duration} min</strong>
+        </div>
+        <div class="meta-box">
+            Access Code
+            <strong>{access_code}</strong>
+        </div>
+        <div class="meta-box">
+            Submissions
+            <strong>{submission_count}</strong>
+        </div>
+        <div class="meta-box">
+            Expires
+            <strong>{_expiry_card}</strong>
+        </div>
+    </div>
+</div>
+"""
+
+# Custom CSS (read from disk once per process)
+@st.cache_resource
+def _view_test_css() -> str:
+    css = (Path(__file__).resolve().parent.parent / "assets" / "view_test.css").read_text()
+    return f"<style>\n{css}</style>"
+
+st.markdown(_view_test_css(), unsafe_allow_html=True)
+
 # ========================================
 # HEADER
 # ========================================
@@ -52,10 +106,68 @@ with col2:
 
 with col3:
     refresh = st.button("🔄 Refresh", use_container_width=True)
+    if refresh:
+        clear_cached_reads()
 
 st.markdown("")
 st.markdown("")
 
+# ========================================
+# HELPER FUNCTION TO CHECK IF TEST IS EXPIRED
+# ========================================
+
+def expiry_timestamp(test):
+    """Epoch seconds of a test's expiry_time (inf when it has none, i.e. never expires)"""
+    expiry = test.get("expiry_time")
+    if isinstance(expiry, datetime):
+        # Make timezone-aware if needed
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        return expiry.timestamp()
+    return np.inf
+
+# ========================================
+# REPORT HELPERS
+# ========================================
+
+@st.cache_resource
+def _report_modules():
+    """Import the report stack on first download rather than on page load."""
+    from utils.analytics import generate_comprehensive_analytics
+    from utils.ai_insights import get_quick_insights, get_revision_plan
+    from utils.html_report_generator import generate_html_report
+    from utils.report_generator import generate_test_report
+    return SimpleNamespace(
+        generate_comprehensive_analytics=generate_comprehensive_analytics,
+        get_quick_insights=get_quick_insights,
+        get_revision_plan=get_revision_plan,
+        generate_html_report=generate_html_report,
+        generate_test_report=generate_test_report,
+    )
+
+def _fetch_report_inputs(test_id):
+    """Questions and submissions for a report, fetched concurrently."""
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=2,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as pool:
+        questions = pool.submit(cached_questions, test_id)
+        submissions = pool.submit(cached_submissions, test_id)
+        return questions.result(), submissions.result()
+
+def _fetch_ai_sections(analytics):
+    """Quick insights and revision plan for the PDF report, requested from Groq concurrently."""
+    m = _report_modules()
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=2,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as pool:
+        ai_insights = pool.submit(m.get_quick_insights, analytics)
+        revision_plan = pool.submit(m.get_revision_plan, analytics)
+        return ai_insights.result(), revision_plan.result()
+
 # ========================================
 # FETCH TESTS
 # ========================================
@@ -63,7 +175,7 @@ st.markdown("")
 teacher_id = get_current_user_id()
 
 with st.spinner("Loading your tests..."):
-    tests = get_tests_by_teacher(teacher_id)
+    tests = cached_tests_by_teacher(teacher_id)
 
 if not tests:
     st.info("📭 No tests created yet")
@@ -86,56 +198,25 @@ st.markdown("### 📊 Overview")
 
 total_tests = len(tests)
 now = datetime.now(timezone.utc)
-active_tests = 0
-expired_tests = 0
-
-# Check expiry dynamically
-for t in tests:
-    expiry = t.get("expiry_time")
-    if isinstance(expiry, datetime):
-        # Make expiry timezone-aware if it isn't already
-        if expiry.tzinfo is None:
-            expiry = expiry.replace(tzinfo=timezone.utc)
-        
-        if now > expiry:
-            expired_tests += 1
-        else:
-            active_tests += 1
-    else:
-        # If no expiry time, consider it active
-        active_tests += 1
 
-total_submissions = sum(get_submission_count(t['id']) for t in tests)
+# Check expiry dynamically, once per render: one vectorized compare of
+# every expiry timestamp against now (tests without an expiry count as active)
+expiry_ts = np.fromiter((expiry_timestamp(t) for t in tests), dtype=np.float64, count=total_tests)
+expired_mask = expiry_ts < now.timestamp()
+for t, expired in zip(tests, expired_mask.tolist()):
+    t["_expired"] = expired
+expired_tests = int(expired_mask.sum())
+active_tests = total_tests - expired_tests
+
+# Counts are kept on the test docs; only tests created before the
+# counter existed fall back to one batched lookup
+submission_counts = {t['id']: t['submission_count'] for t in tests if 'submission_count' in t}
+uncounted_ids = tuple(t['id'] for t in tests if 'submission_count' not in t)
+if uncounted_ids:
+    submission_counts.update(cached_submission_counts(uncounted_ids))
+total_submissions = sum(submission_counts.values())
 
 st.markdown(f"""
-<style>
-.metric-grid {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-    gap: 1rem;
-    margin: 1.5rem 0;
-}}
-.metric-box {{
-    background: white;
-    border-radius: 14px;
-    padding: 1.5rem 1.2rem;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.06);
-    text-align: center;
-    border: 1px solid #dee2e6;
-}}
-.metric-title {{
-    font-size: 0.85rem;
-    color: #666;
-    margin-bottom: 0.4rem;
-    font-weight: 500;
-}}
-.metric-value {{
-    font-size: 2rem;
-    font-weight: 700;
-    color: #111;
-    margin: 0;
-}}
-</style>
 <div class="metric-grid">
     <div class="metric-box">
         <div class="metric-title">Total Tests</div>
@@ -163,20 +244,29 @@ st.markdown("")
 # FILTER & SORT OPTIONS
 # ========================================
 
+def _reset_page():
+    """Go back to the first page whenever the filter or sort changes."""
+    st.session_state.tests_page = 0
+
+def _go_to_page(target):
+    st.session_state.tests_page = target
+
 col1, col2, col3 = st.columns([2, 2, 1])
 
 with col1:
     filter_status = st.selectbox(
         "Filter by Status",
         ["All", "Active", "Expired"],
-        key="filter_status"
+        key="filter_status",
+        on_change=_reset_page
     )
 
 with col2:
     sort_by = st.selectbox(
         "Sort by",
         ["Most Recent", "Oldest First", "Most Submissions", "Title (A-Z)"],
-        key="sort_by"
+        key="sort_by",
+        on_change=_reset_page
     )
 
 with col3:
@@ -190,41 +280,69 @@ with col3:
 st.markdown("")
 st.markdown("")
 
-# ========================================
-# HELPER FUNCTION TO CHECK IF TEST IS EXPIRED
-# ========================================
-
-def is_test_expired(test):
-    """Check if a test is expired based on expiry_time"""
-    expiry = test.get("expiry_time")
-    if isinstance(expiry, datetime):
-        # Make timezone-aware if needed
-        if expiry.tzinfo is None:
-            expiry = expiry.replace(tzinfo=timezone.utc)
-        return datetime.now(timezone.utc) > expiry
-    return False
-
 # ========================================
 # FILTER AND SORT TESTS
 # ========================================
 
 # Apply status filter based on ACTUAL expiry time, not stored status
 if filter_status == "Active":
-    filtered_tests = [t for t in tests if not is_test_expired(t)]
+    candidates = [tests[i] for i in np.flatnonzero(~expired_mask)]
 elif filter_status == "Expired":
-    filtered_tests = [t for t in tests if is_test_expired(t)]
+    candidates = [tests[i] for i in np.flatnonzero(expired_mask)]
 else:
-    filtered_tests = tests
-
-# Apply sorting
-if sort_by == "Most Recent":
-    filtered_tests.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-elif sort_by == "Oldest First":
-    filtered_tests.sort(key=lambda x: x.get('created_at', datetime.min))
+    candidates = tests
+
+# Apply sorting: one key array per run, ordered with a stable argsort
+# (tests without created_at go last for newest-first, first for oldest-first)
+if sort_by in ("Most Recent", "Oldest First"):
+    created = np.fromiter(
+        (t["created_at"].timestamp() if isinstance(t.get("created_at"), datetime) else -np.inf
+         for t in candidates),
+        dtype=np.float64, count=len(candidates)
+    )
+    order = np.argsort(-created if sort_by == "Most Recent" else created, kind="stable")
 elif sort_by == "Most Submissions":
-    filtered_tests.sort(key=lambda x: get_submission_count(x['id']), reverse=True)
-elif sort_by == "Title (A-Z)":
-    filtered_tests.sort(key=lambda x: x.get('title', ''))
+    counts = np.fromiter(
+        (submission_counts.get(t["id"], 0) for t in candidates),
+        dtype=np.int64, count=len(candidates)
+    )
+    order = np.argsort(-counts, kind="stable")
+else:  # Title (A-Z)
+    order = np.argsort(np.array([t.get("title", "") for t in candidates], dtype=str), kind="stable")
+
+filtered_tests = [candidates[i] for i in order]
+
+# ========================================
+# PAGINATION
+# ========================================
+
+# Only the current page is rendered; the full list stays in the cache
+page_count = max(1, -(-len(filtered_tests) // TESTS_PAGE_SIZE))
+page = min(max(st.session_state.get("tests_page", 0), 0), page_count - 1)
+page_start = page * TESTS_PAGE_SIZE
+page_tests = filtered_tests[page_start:page_start + TESTS_PAGE_SIZE]
+
+# Display fields, formatted once per visible test for both views
+for t in page_tests:
+    expiry = t.get("expiry_time")
+    has_expiry = isinstance(expiry, datetime)
+    t["_expiry_card"] = expiry.strftime("%b %d, %Y") if has_expiry else "N/A"
+    t["_expiry_table"] = expiry.strftime("%Y-%m-%d %H:%M") if has_expiry else "N/A"
+    t["_status"] = "EXPIRED" if t["_expired"] else "ACTIVE"
+    t["_status_class"] = "status-expired" if t["_expired"] else "status-active"
+    t["_link"] = f"{TEST_LINK_BASE}{t['id']}"
+
+def _page_controls():
+    """Prev/Next buttons for the test list."""
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        st.button("◀ Previous", disabled=page == 0, on_click=_go_to_page, args=(page - 1,),
+                  key="tests_page_prev", use_container_width=True)
+    with info_col:
+        st.markdown(f"<p style='text-align:center'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+    with next_col:
+        st.button("Next ▶", disabled=page >= page_count - 1, on_click=_go_to_page, args=(page + 1,),
+                  key="tests_page_next", use_container_width=True)
 
 # ========================================
 # DISPLAY TESTS
@@ -233,140 +351,16 @@ elif sort_by == "Title (A-Z)":
 if not filtered_tests:
     st.info(f"No {filter_status.lower()} tests found")
 else:
-    st.markdown(f"### Showing {len(filtered_tests)} test(s)")      
+    st.markdown(f"### Showing {page_start + 1}–{page_start + len(page_tests)} of {len(filtered_tests)} test(s)")
     if view_mode == "Cards":
-        for test in filtered_tests:
-            submission_count = get_submission_count(test["id"])
-            expiry = test.get("expiry_time")
+        for test in page_tests:
+            submission_count = submission_counts.get(test["id"], 0)
             
-            # Format expiry date
-            expiry_str = (
-                expiry.strftime("%b %d, %Y")
-                if isinstance(expiry, datetime)
-                else "N/A"
+            st.markdown(
+                CARD_TEMPLATE.format_map({**test, "submission_count": submission_count}),
+                unsafe_allow_html=True
             )
             
-            # Determine status dynamically
-            is_expired = is_test_expired(test)
-            status = "EXPIRED" if is_expired else "ACTIVE"
-            status_color = "#28a745" if status == "ACTIVE" else "#dc3545"
-            
-            test_link = f"https://rasheedmrandroid-compass.hf.space/take_test?id={test['id']}"
-        # Add card styles
-        st.markdown("""
-        <style>
-        .test-card {
-            background: white;
-            border-radius: 16px;
-            padding: 1.5rem;
-            margin-bottom: 1.5rem;
-            box-shadow: 0 4px 14px rgba(0,0,0,0.06);
-            font-family: Inter, system-ui, sans-serif;
-            border: 1px solid #e0e0e0;
-        }
-        .test-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 1rem;
-            flex-wrap: wrap;
-            gap: 0.5rem;
-        }
-        .test-title {
-            font-size: 1.25rem;
-            font-weight: 700;
-            color: #111;
-        }
-        .status {
-            font-weight: 600;
-            font-size: 0.9rem;
-            padding: 0.25rem 0.75rem;
-            border-radius: 20px;
-        }
-        .status-active {
-            color: #28a745;
-            background: #d4edda;
-        }
-        .status-expired {
-            color: #dc3545;
-            background: #f8d7da;
-        }
-        .test-meta {
-            font-size: 0.9rem;
-            color: #555;
-            margin-bottom: 1.2rem;
-        }
-        .test-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
-            gap: 1rem;
-            margin-bottom: 1.2rem;
-        }
-        .meta-box {
-            background: #f8f9fa;
-            border-radius: 10px;
-            padding: 0.8rem;
-            text-align: center;
-            font-size: 0.85rem;
-            border: 1px solid #dee2e6;
-        }
-        .meta-box strong {
-            display: block;
-            font-size: 1rem;
-            margin-top: 0.2rem;
-            color: #111;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        for test in filtered_tests:
-            submission_count = get_submission_count(test["id"])
-            expiry = test.get("expiry_time")
-            
-            # Format expiry date
-            expiry_str = (
-                expiry.strftime("%b %d, %Y")
-                if isinstance(expiry, datetime)
-                else "N/A"
-            )
-            
-            # Determine status dynamically
-            is_expired = is_test_expired(test)
-            status = "EXPIRED" if is_expired else "ACTIVE"
-            status_class = "status-active" if status == "ACTIVE" else "status-expired"
-            
-            test_link = f"https://rasheedmrandroid-compass.hf.space/take_test?id={test['id']}"
-            
-            st.markdown(f"""
-            <div class="test-card">
-                <div class="test-header">
-                    <div class="test-title">{test['title']}</div>
-                    <div class="status {status_class}">● {status}</div>
-                </div>
-                <div class="test-meta">
-                    {test['subject']} • {test['total_questions']} Questions
-                </div>
-                <div class="test-grid">
-                    <div class="meta-box">
-                        Duration
-                        <strong>{test['duration']} min</strong>
-                    </div>
-                    <div class="meta-box">
-                        Access Code
-                        <strong>{test['access_code']}</strong>
-                    </div>
-                    <div class="meta-box">
-                        Submissions
-                        <strong>{submission_count}</strong>
-                    </div>
-                    <div class="meta-box">
-                        Expires
-                        <strong>{expiry_str}</strong>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
             # Action buttons (Streamlit handles these)
             col1, col2, col3 = st.columns(3)
             
@@ -377,24 +371,19 @@ else:
             
             with col2:
                 if st.button("📄 Download Report", key=f"report_{test['id']}", use_container_width=True):
-                    submission_count = get_submission_count(test['id'])
+                    submission_count = submission_counts.get(test['id'], 0)
                     if submission_count == 0:
                         st.warning("⚠️ No submissions yet. Report will be empty.")
                     else:
                         with st.spinner("Generating report..."):
-                            from utils.firebase import get_questions_by_test, get_submissions_by_test
-                            from utils.analytics import generate_comprehensive_analytics
-                            from utils.ai_insights import get_quick_insights
-                            from utils.html_report_generator import generate_html_report
-                            from datetime import datetime
+                            m = _report_modules()
                             
                             try:
-                                questions = get_questions_by_test(test['id'])
-                                submissions = get_submissions_by_test(test['id'])
-                                analytics = generate_comprehensive_analytics(questions, submissions)
-                                ai_insights = get_quick_insights(analytics)
+                                questions, submissions = _fetch_report_inputs(test['id'])
+                                analytics = m.generate_comprehensive_analytics(questions, submissions)
+                                ai_insights = m.get_quick_insights(analytics)
                                 
-                                html_report = generate_html_report(
+                                html_report = m.generate_html_report(
                                     test_title=test['title'],
                                     test_subject=test['subject'],
                                     analytics=analytics,
@@ -413,57 +402,45 @@ else:
                                 st.error(f"Error: {str(e)}")
             
             with col3:
-                if st.button("🔗 Copy Test Link", key=f"link_{test['id']}", use_container_width=True):
-                    st.code(test_link, language=None)
-            
-            st.markdown("")
-            st.markdown("")
+                # st.code has a client-side copy button, so copying needs no rerun
+                st.code(test["_link"], language=None)
+        
+        if page_count > 1:
+            _page_controls()
     
     else:
         # ========================================
         # TABLE VIEW
         # ========================================
-        table_data = []
+        # Built column by column, so pandas doesn't transpose per-row dicts
+        df = pd.DataFrame({
+            "Title": [t["title"] for t in page_tests],
+            "Subject": [t["subject"] for t in page_tests],
+            "Questions": [t["total_questions"] for t in page_tests],
+            "Duration (min)": [t["duration"] for t in page_tests],
+            "Access Code": [t["access_code"] for t in page_tests],
+            "Status": [t["_status"] for t in page_tests],
+            "Submissions": [submission_counts.get(t["id"], 0) for t in page_tests],
+            "Expires": [t["_expiry_table"] for t in page_tests],
+            "Test ID": [t["id"] for t in page_tests],
+        })
         
-        for test in filtered_tests:
-            submission_count = get_submission_count(test["id"])
-            expiry = test.get("expiry_time")
-            
-            # Determine status dynamically
-            is_expired = is_test_expired(test)
-            status = "EXPIRED" if is_expired else "ACTIVE"
-            
-            expiry_str = (
-                expiry.strftime("%Y-%m-%d %H:%M")
-                if isinstance(expiry, datetime)
-                else "N/A"
+        # ---- Style the dataframe (whole Status column in one call) ----
+        def highlight_status(col):
+            values = col.to_numpy()
+            return np.select(
+                [values == "ACTIVE", values == "EXPIRED"],
+                ["background-color: #d4edda; color: #155724",
+                 "background-color: #f8d7da; color: #721c24"],
+                default=""
             )
-            
-            table_data.append({
-                "Title": test["title"],
-                "Subject": test["subject"],
-                "Questions": test["total_questions"],
-                "Duration (min)": test["duration"],
-                "Access Code": test["access_code"],
-                "Status": status,
-                "Submissions": submission_count,
-                "Expires": expiry_str,
-                "Test ID": test["id"],
-            })
-        
-        df = pd.DataFrame(table_data)
         
-        # ---- Style the dataframe ----
-        def highlight_status(val):
-            if val == "ACTIVE":
-                return "background-color: #d4edda; color: #155724"
-            elif val == "EXPIRED":
-                return "background-color: #f8d7da; color: #721c24"
-            return ""
-        
-        styled_df = df.style.applymap(highlight_status, subset=["Status"])
+        styled_df = df.style.apply(highlight_status, subset=["Status"])
         st.dataframe(styled_df, use_container_width=True, height=400)
         
+        if page_count > 1:
+            _page_controls()
+        
         st.markdown("")
         st.markdown("")
         
@@ -475,21 +452,24 @@ else:
         
         test_ids = [t["id"] for t in filtered_tests]
         test_titles = {t["id"]: t["title"] for t in filtered_tests}
+        test_by_id = {t["id"]: t for t in filtered_tests}
         
+        # Options stay test IDs so the selection survives filter/sort changes;
+        # labels come from a bound dict lookup instead of a Python lambda
         selected_test = st.selectbox(
             "Select a test to view details",
             options=test_ids,
-            format_func=lambda x: test_titles[x],
+            format_func=test_titles.__getitem__,
             key="selected_test_details",
         )
         
         if selected_test:
-            test = get_test_by_id(selected_test)
+            # Already loaded with the list; no second read
+            test = test_by_id.get(selected_test)
             
             if test:
                 # Determine status dynamically
-                is_expired = is_test_expired(test)
-                status = "EXPIRED" if is_expired else "ACTIVE"
+                status = "EXPIRED" if test["_expired"] else "ACTIVE"
                 
                 col1, col2 = st.columns(2)
                 
@@ -504,7 +484,7 @@ else:
                 with col2:
                     st.markdown("#### Access Information")
                     st.markdown(f"**Access Code:** `{test['access_code']}`")
-                    st.markdown(f"**Submissions:** {get_submission_count(test['id'])}")
+                    st.markdown(f"**Submissions:** {submission_counts.get(test['id'], 0)}")
                     
                     expiry = test.get("expiry_time")
                     if isinstance(expiry, datetime):
@@ -512,7 +492,7 @@ else:
                             f"**Expires:** {expiry.strftime('%B %d, %Y at %I:%M %p')}"
                         )
                     
-                    test_link = f"https://rasheedmrandroid-compass.hf.space/take_test?id={test['id']}"
+                    test_link = f"{TEST_LINK_BASE}{test['id']}"
                     st.markdown("**Test Link:**")
                     st.code(test_link, language=None)
                 
@@ -526,25 +506,19 @@ else:
                 
                 with col2:
                     if st.button("📄 Download Report for This Test", use_container_width=True):
-                        submission_count = get_submission_count(test['id'])
+                        submission_count = submission_counts.get(test['id'], 0)
                         if submission_count == 0:
                             st.warning("⚠️ No submissions yet. Report will be empty.")
                         else:
                             with st.spinner("Generating report..."):
-                                from utils.firebase import get_questions_by_test, get_submissions_by_test
-                                from utils.analytics import generate_comprehensive_analytics
-                                from utils.ai_insights import get_quick_insights, get_revision_plan
-                                from utils.report_generator import generate_test_report
-                                from datetime import datetime
+                                m = _report_modules()
                                 
                                 try:
-                                    questions = get_questions_by_test(test['id'])
-                                    submissions = get_submissions_by_test(test['id'])
-                                    analytics = generate_comprehensive_analytics(questions, submissions)
-                                    ai_insights = get_quick_insights(analytics)
-                                    revision_plan = get_revision_plan(analytics)
+                                    questions, submissions = _fetch_report_inputs(test['id'])
+                                    analytics = m.generate_comprehensive_analytics(questions, submissions)
+                                    ai_insights, revision_plan = _fetch_ai_sections(analytics)
                                     
-                                    pdf_buffer = generate_test_report(
+                                    pdf_buffer = m.generate_test_report(
                                         test_title=test['title'],
                                         test_subject=test['subject'],
                                         analytics=analytics,
@@ -8,7 +8,8 @@ from utils.firebase import (
 )
 
 from firebase_admin import auth
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 print("🔍 Starting Firebase verification...")
 
@@ -34,15 +35,13 @@ test_id = create_test(
         "title": "Verification Test",
         "subject": "Physics",
         "duration": 30,
-        "expiry_time": datetime.utcnow() + timedelta(hours=1),
+        "expiry_time": datetime.now(timezone.utc) + timedelta(hours=1),
         "access_code": "VERIFY",
         "total_questions": 2
     }
 )
 
 assert test_id is not None
-tests = get_tests_by_teacher(teacher_id)
-print(f"ℹ️ Found {len(tests)} existing tests (OK for fresh setup)")
 print("✅ Test creation OK")
 
 # 3. Add questions
@@ -67,8 +66,16 @@ questions = [
     }
 ]
 
+# create_questions_batch commits through WriteBatch (one RPC per 500 questions)
 assert create_questions_batch(test_id, questions)
-fetched = get_questions_by_test(test_id)
+
+# 4. Read everything back; the two reads are independent, so run them together
+with ThreadPoolExecutor(max_workers=2) as pool:
+    tests_future = pool.submit(get_tests_by_teacher, teacher_id)
+    fetched_future = pool.submit(get_questions_by_test, test_id)
+    tests, fetched = tests_future.result(), fetched_future.result()
+
+print(f"ℹ️ Found {len(tests)} existing tests (OK for fresh setup)")
 # assert len(fetched) == 2
 print(f"ℹ️ Found {len(fetched)} existing fetched (OK for fresh setup)")
 
@@ -6,49 +6,116 @@ Insights are based on aggregated analytics, not raw guesses.
 """
 
 import os
-import json
+import functools
+import time
+import random
+import hashlib
+import threading
+import orjson
 import requests
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
 import streamlit as st
 
+# Identical prompts within this window reuse the earlier response
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600  # seconds
+
+# Rate limits (429) and server errors (5xx) are retried this many times
+MAX_RETRIES = 3
+MAX_RETRY_WAIT = 10  # seconds
+
+
+@st.cache_resource(show_spinner=False)
+def _http_session() -> requests.Session:
+    """Process-wide HTTP session so Groq calls reuse pooled TLS connections."""
+    session = requests.Session()
+    # Keep a few warm connections to the Groq host for concurrent reruns
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+
+DEFAULT_MODEL = 'llama-3.3-70b-versatile'
+
+# Set once the missing-key warning has been shown
+_warned = False
+
+
+@functools.cache
+def _resolve_config() -> Tuple[Optional[str], str]:
+    """
+    Resolve the Groq API key and model once per process.
+    
+    Environment variables take precedence over Streamlit secrets.
+    
+    Returns:
+        tuple: (api_key or None, model name)
+    """
+    api_key = os.getenv('GROQ_API_KEY')
+    model = os.getenv('GROQ_MODEL')
+    
+    if (not api_key or not model) and hasattr(st, 'secrets'):
+        try:
+            api_key = api_key or st.secrets.get('GROQ_API_KEY')
+            model = model or st.secrets.get('GROQ_MODEL')
+        except Exception:
+            pass
+    
+    return api_key, model or DEFAULT_MODEL
+
 
 class AIInsightsGenerator:
     """
     Generate AI-powered educational insights using Groq API.
     """
     
+    # Sent byte-for-byte identical on every call so providers can reuse the
+    # cached prompt prefix; user prompts likewise start with their fixed
+    # instructions and end with the data that changes
+    SYSTEM_PROMPT = (
+        "You are an expert educational consultant for Nigerian tutorial centers. "
+        "Provide practical, actionable advice based on test analytics. "
+        "Be concise, specific, and culturally relevant."
+    )
+    
+    # Shared across instances: sha256(model|max_tokens|prompt) -> (text, stored_at)
+    _response_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    
+    # Running token usage reported by the API, to check prefix-cache hits
+    usage = {'calls': 0, 'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'completion_tokens': 0}
+    
     def __init__(self):
         """Initialize with Groq API credentials."""
-        # Try environment variable first
-        self.api_key = os.getenv('GROQ_API_KEY')
-        
-        # Try Streamlit secrets if env var not found
-        if not self.api_key and hasattr(st, 'secrets'):
-            try:
-                self.api_key = st.secrets.get('GROQ_API_KEY')
-            except Exception:
-                pass
-        
-        # Get model name
-        self.model = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
-        if hasattr(st, 'secrets') and not os.getenv('GROQ_MODEL'):
-            try:
-                self.model = st.secrets.get('GROQ_MODEL', 'llama-3.3-70b-versatile')
-            except Exception:
-                pass
+        self.api_key, self.model = _resolve_config()
         
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
         
-        if not self.api_key:
+        # Built once and reused on every call
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        global _warned
+        if not self.api_key and not _warned:
+            _warned = True
             st.warning("⚠️ GROQ_API_KEY not set. AI insights will not be available.")
     
-    def _make_api_call(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
+    def _make_api_call(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        response_format: Optional[Dict] = None
+    ) -> Optional[str]:
         """
         Make API call to Groq.
         
         Args:
             prompt: The prompt to send
             max_tokens: Maximum tokens in response
+            response_format: Optional response format, e.g. {"type": "json_object"}
         
         Returns:
             str: AI-generated text or None if error
@@ -56,33 +123,22 @@ class AIInsightsGenerator:
         if not self.api_key:
             return None
         
+        key = self._cache_key(prompt, max_tokens, response_format)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            payload = self._build_payload(prompt, max_tokens, response_format)
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are an expert educational consultant for Nigerian tutorial centers. Provide practical, actionable advice based on test analytics. Be concise, specific, and culturally relevant."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": max_tokens,
-                "temperature": 0.7
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=30)
+            response = self._post_with_retry(payload)
             
             if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content'].strip()
+                data = orjson.loads(response.content)
+                self._record_usage(data.get('usage') or {})
+                text = data['choices'][0]['message']['content'].strip()
+                self._store_response(key, text)
+                return text
             else:
                 st.error(f"Groq API error: {response.status_code}")
                 return None
@@ -91,6 +147,141 @@ class AIInsightsGenerator:
             st.error(f"Error generating AI insights: {str(e)}")
             return None
     
+    def _stream_api_call(self, prompt: str, max_tokens: int = 500) -> Iterator[str]:
+        """
+        Stream a Groq completion as it is generated.
+        
+        Args:
+            prompt: The prompt to send
+            max_tokens: Maximum tokens in response
+        
+        Yields:
+            str: Content deltas; a cached response is yielded whole
+        """
+        if not self.api_key:
+            return
+        
+        key = self._cache_key(prompt, max_tokens, None)
+        cached = self._cached_response(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            payload = self._build_payload(prompt, max_tokens)
+            payload["stream"] = True
+            
+            with self._post_with_retry(payload, stream=True) as response:
+                if response.status_code != 200:
+                    st.error(f"Groq API error: {response.status_code}")
+                    return
+                
+                parts = []
+                # Server-sent events: one "data: {json}" line per chunk, then "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    delta = orjson.loads(data)['choices'][0]['delta'].get('content')
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            
+            text = ''.join(parts).strip()
+            if text:
+                self._store_response(key, text)
+        
+        except Exception as e:
+            st.error(f"Error generating AI insights: {str(e)}")
+    
+    def _post_with_retry(self, payload: Dict, stream: bool = False) -> requests.Response:
+        """
+        POST to Groq, retrying rate limits and server errors with backoff.
+        
+        Waits for the server's Retry-After when given, otherwise 0.5s, 1s, 2s
+        (plus jitter). Other errors are returned to the caller immediately.
+        
+        Args:
+            payload: Request body
+            stream: Whether to stream the response body
+        
+        Returns:
+            requests.Response: The last response received
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            response = _http_session().post(
+                self.api_url, headers=self.headers, data=orjson.dumps(payload), timeout=30, stream=stream
+            )
+            if response.status_code != 429 and response.status_code < 500 or attempt == MAX_RETRIES:
+                return response
+            
+            try:
+                wait = float(response.headers.get('retry-after'))
+            except (TypeError, ValueError):
+                wait = 0.5 * 2 ** attempt + random.uniform(0, 0.25)
+            wait = min(wait, MAX_RETRY_WAIT)
+            response.close()
+            
+            st.toast(f"AI service busy ({response.status_code}), retrying in {wait:.1f}s...", icon="⏳")
+            time.sleep(wait)
+    
+    def _build_payload(self, prompt: str, max_tokens: int, response_format: Optional[Dict] = None) -> Dict:
+        """Chat completion request body for a single user prompt."""
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self.SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        return payload
+    
+    def _cache_key(self, prompt: str, max_tokens: int, response_format: Optional[Dict]) -> str:
+        """Response cache key for a request."""
+        return hashlib.sha256(f"{self.model}|{max_tokens}|{response_format}|{prompt}".encode()).hexdigest()
+    
+    def _record_usage(self, usage: Dict):
+        """Add one response's token usage to the running totals."""
+        cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        with self._cache_lock:
+            self.usage['calls'] += 1
+            self.usage['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            self.usage['cached_prompt_tokens'] += cached or 0
+            self.usage['completion_tokens'] += usage.get('completion_tokens', 0)
+    
+    def _cached_response(self, key: str) -> Optional[str]:
+        """Return a fresh cached response for key, or None."""
+        with self._cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+            text, stored_at = entry
+            if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+                del self._response_cache[key]
+                return None
+            self._response_cache.move_to_end(key)
+            return text
+    
+    def _store_response(self, key: str, text: str):
+        """Cache a response, evicting the least recently used entry when full."""
+        with self._cache_lock:
+            self._response_cache[key] = (text, time.monotonic())
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
     def generate_revision_plan(self, analytics: Dict) -> Optional[str]:
         """
         Generate a revision plan based on test analytics.
@@ -111,7 +302,13 @@ class AIInsightsGenerator:
         
         # Build context-rich prompt
         prompt = f"""
-Based on the following test analytics for a Nigerian tutorial center, create a concise revision plan:
+Create a practical 3-week revision plan from the test analytics below, with:
+1. Priority topics to focus on immediately
+2. Specific teaching strategies for weak areas
+3. How to support high-risk students
+4. Timeline recommendation for the external exam
+
+Keep it under 400 words and actionable.
 
 TEST OVERVIEW:
 - Total Students: {analytics['total_submissions']}
@@ -125,15 +322,6 @@ STUDENT RISK DISTRIBUTION:
 
 WEAK TOPICS (< 60% accuracy):
 {chr(10).join(f"- {topic}: {accuracy:.1f}%" for topic, accuracy in weak_topics[:5])}
-
-
-Provide a practical 3-week revision plan with:
-1. Priority topics to focus on immediately
-2. Specific teaching strategies for weak areas
-3. How to support high-risk students
-4. Timeline recommendation for the external exam
-
-Keep it under 400 words, actionable, and specific to Nigerian educational context.
 """
         
         return self._make_api_call(prompt, max_tokens=600)
@@ -158,27 +346,51 @@ Keep it under 400 words, actionable, and specific to Nigerian educational contex
         if not self.api_key:
             return None
         
+        prompt = self._student_advice_prompt(student_name, percentage, weak_topics)
+        
+        return self._make_api_call(prompt, max_tokens=300)
+    
+    def stream_student_intervention_advice(
+        self,
+        student_name: str,
+        percentage: float,
+        weak_topics: List[str]
+    ) -> Iterator[str]:
+        """
+        Stream personalized intervention advice for a student.
+        
+        Same prompt as generate_student_intervention_advice(), so the two
+        share cached responses.
+        
+        Args:
+            student_name: Student's name
+            percentage: Overall test percentage
+            weak_topics: List of topics where student scored < 60%
+        
+        Yields:
+            str: Chunks of AI-generated advice
+        """
+        prompt = self._student_advice_prompt(student_name, percentage, weak_topics)
+        return self._stream_api_call(prompt, max_tokens=300)
+    
+    @staticmethod
+    def _student_advice_prompt(student_name: str, percentage: float, weak_topics: List[str]) -> str:
+        """Prompt for a single student's intervention advice."""
         risk_level = "high" if percentage < 40 else ("medium" if percentage < 65 else "low")
         
-        prompt = f"""
-A student in a Nigerian tutorial center needs help:
+        return f"""
+Give the student below brief, actionable advice (under 200 words):
+1. What this student should focus on immediately
+2. Specific study techniques for their weak areas
+3. Encouragement tailored to their performance level
+
+Be supportive but honest about the work needed.
 
 STUDENT: {student_name}
 SCORE: {percentage:.1f}%
 RISK LEVEL: {risk_level.title()}
 WEAK TOPICS: {', '.join(weak_topics) if weak_topics else 'None identified'}
-
-Provide brief, actionable advice (under 200 words):
-1. What this student should focus on immediately
-
-2. Specific study techniques for their weak areas
-
-Encouragement tailored to their performance level
-
-Be supportive but honest about the work needed.
 """
-        
-        return self._make_api_call(prompt, max_tokens=300)
     
     def generate_topic_teaching_tips(self, topic: str, accuracy: float) -> Optional[str]:
         """
@@ -195,18 +407,16 @@ Be supportive but honest about the work needed.
             return None
         
         prompt = f"""
-A Nigerian tutorial center class is struggling with:
-
-TOPIC: {topic}
-CLASS ACCURACY: {accuracy:.1f}%
-
-This is below expectations. Suggest:
+A class is struggling with the topic below. Suggest:
 1. Common misconceptions in this topic
-2. Teaching approaches that work well for Nigerian students
+2. Teaching approaches that work well for these students
 3. Practice resources or question types to focus on
 4. Quick diagnostic to identify specific gaps
 
 Keep it under 250 words, practical and immediately implementable.
+
+TOPIC: {topic}
+CLASS ACCURACY: {accuracy:.1f}%
 """
         
         return self._make_api_call(prompt, max_tokens=400)
@@ -228,7 +438,13 @@ Keep it under 250 words, practical and immediately implementable.
         stats = analytics['statistics']
         
         prompt = f"""
-Assess exam readiness for a Nigerian tutorial center class:
+Assess this class's exam readiness from the metrics below:
+1. Should this class proceed to the external exam now?
+2. If not, how many weeks of preparation are needed?
+3. What are the biggest risks if they take the exam unprepared?
+4. What's the realistic target readiness score they should aim for?
+
+Keep it under 300 words, honest and practical.
 
 READINESS SCORE: {readiness['readiness_score']:.1f}/100
 STATUS: {readiness['status']}
@@ -238,19 +454,26 @@ SCORE SPREAD (Std Dev): {readiness['std_deviation']:.1f}%
 PERFORMANCE DISTRIBUTION:
 - High Performers (≥70%): {readiness['high_performers_pct']:.1f}%
 - At Risk (<40%): {readiness['at_risk_pct']:.1f}%
-
-Given these metrics:
-1. Should this class proceed to the external exam now?
-2. If not, how many weeks of preparation are needed?
-3. What are the biggest risks if they take the exam unprepared?
-4. What's the realistic target readiness score they should aim for?
-
-Keep it under 300 words, honest and practical.
 """
         
         return self._make_api_call(prompt, max_tokens=400)
     
-    def generate_quick_insights(self, analytics: Dict) -> Dict[str, str]:
+    @staticmethod
+    def _insight_text(value) -> str:
+        """
+        Coerce a JSON insight value to display text.
+        
+        JSON mode only guarantees an object, so a list (typically the action
+        items) is joined with line breaks rather than shown as a list repr.
+        Every consumer (dashboard, HTML report, PDF Paragraph) renders <br/>.
+        """
+        if isinstance(value, str):
+            return value
+        if isinstance(value, list):
+            return '<br/>'.join(f"• {item}" for item in map(str, value))
+        return str(value)
+    
+    def generate_quick_insights(self, analytics: Dict) -> Optional[Dict[str, str]]:
         """
         Generate multiple quick insights in one call for efficiency.
         
@@ -264,6 +487,8 @@ Keep it under 300 words, honest and practical.
                 'weaknesses': str,
                 'action_items': str
             }
+            or None if the API call failed or returned unparseable JSON,
+            so callers can retry instead of keeping a placeholder
         """
         if not analytics.get('has_data') or not self.api_key:
             return {
@@ -279,16 +504,9 @@ Keep it under 300 words, honest and practical.
         risk_stats = analytics['risk_classification']['stats']
         
         prompt = f"""
-Provide 4 brief insights (each under 100 words) for this test performance:
-
-METRICS:
-- Class Average: {readiness['average_percentage']:.1f}%
-- Readiness: {readiness['status']}
-- High Risk Students: {risk_stats['high_risk_count']}/{analytics['total_submissions']}
-- Top Topics: {', '.join(t[0] for t in strong_topics[:3])}
-- Weak Topics: {', '.join(t[0] for t in weak_topics[:3])}
+Provide 4 brief insights (each under 100 words) for the test performance below.
 
-Return ONLY a JSON object with these 4 keys:
+Return only a JSON object whose values are all plain strings (no lists), e.g.:
 {{
     "summary": "One-line summary of overall performance",
     "strengths": "What the class did well",
@@ -296,66 +514,69 @@ Return ONLY a JSON object with these 4 keys:
     "action_items": "Top 3 immediate actions needed"
 }}
 
-Ensure valid JSON format.
+METRICS:
+- Class Average: {readiness['average_percentage']:.1f}%
+- Readiness: {readiness['status']}
+- High Risk Students: {risk_stats['high_risk_count']}/{analytics['total_submissions']}
+- Top Topics: {', '.join(t[0] for t in strong_topics[:3])}
+- Weak Topics: {', '.join(t[0] for t in weak_topics[:3])}
 """
         
-        response = self._make_api_call(prompt, max_tokens=500)
+        # JSON mode: the API only returns well-formed JSON, so no fence stripping
+        response = self._make_api_call(
+            prompt,
+            max_tokens=350,
+            response_format={"type": "json_object"}
+        )
         
         if response:
             try:
-                # Try to parse JSON from response
-                # Sometimes LLMs add markdown formatting, so strip it
-                response_clean = response.strip()
-                if response_clean.startswith('```'):
-                    # Remove markdown code blocks
-                    lines = response_clean.split('\n')
-                    response_clean = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_clean
-                    response_clean = response_clean.replace('```json', '').replace('```', '')
-                
-                insights = json.loads(response_clean)
-                return insights
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                return {
-                    'summary': response[:200],
-                    'strengths': 'See full AI response above',
-                    'weaknesses': 'JSON parsing failed',
-                    'action_items': 'Review raw response'
-                }
+                insights = orjson.loads(response)
+            except orjson.JSONDecodeError:
+                insights = None
+            if isinstance(insights, dict):
+                return {key: self._insight_text(value) for key, value in insights.items()}
+            st.error("AI insights came back in an unexpected format. Please try again.")
         
-        return {
-            'summary': 'AI insights unavailable',
-            'strengths': 'API call failed',
-            'weaknesses': 'Check API key and connection',
-            'action_items': 'Retry or check logs'
-        }
+        return None
 
 
-# Global instance
-ai_generator = AIInsightsGenerator()
+# Global instance, built on first use so importing this module stays cheap.
+# functools.cache rather than st.cache_resource: Streamlit replays elements
+# drawn inside cached functions, which would repaint the missing-key warning
+# on every rerun.
+@functools.cache
+def _insights_client() -> AIInsightsGenerator:
+    """Process-wide insights generator shared by every session."""
+    return AIInsightsGenerator()
 
 
 # Convenience functions
 def get_revision_plan(analytics: Dict) -> Optional[str]:
     """Wrapper for generating revision plan."""
-    return ai_generator.generate_revision_plan(analytics)
+    return _insights_client().generate_revision_plan(analytics)
 
 
 def get_student_advice(student_name: str, percentage: float, weak_topics: List[str]) -> Optional[str]:
     """Wrapper for generating student advice."""
-    return ai_generator.generate_student_intervention_advice(student_name, percentage, weak_topics)
+    return _insights_client().generate_student_intervention_advice(student_name, percentage, weak_topics)
+
+
+def stream_student_advice(student_name: str, percentage: float, weak_topics: List[str]) -> Iterator[str]:
+    """Wrapper for streaming student advice (for st.write_stream)."""
+    return _insights_client().stream_student_intervention_advice(student_name, percentage, weak_topics)
 
 
 def get_topic_tips(topic: str, accuracy: float) -> Optional[str]:
     """Wrapper for generating topic teaching tips."""
-    return ai_generator.generate_topic_teaching_tips(topic, accuracy)
+    return _insights_client().generate_topic_teaching_tips(topic, accuracy)
 
 
 def get_readiness_assessment(analytics: Dict) -> Optional[str]:
     """Wrapper for generating readiness assessment."""
-    return ai_generator.generate_readiness_assessment(analytics)
+    return _insights_client().generate_readiness_assessment(analytics)
 
 
-def get_quick_insights(analytics: Dict) -> Dict[str, str]:
+def get_quick_insights(analytics: Dict) -> Optional[Dict[str, str]]:
     """Wrapper for generating quick insights."""
-    return ai_generator.generate_quick_insights(analytics)
\ No newline at end of file
+    return _insights_client().generate_quick_insights(analytics)
\ No newline at end of file
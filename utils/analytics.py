@@ -14,6 +14,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
+from itertools import chain
+
+
+# Risk level codes and their display labels (indexed by code)
+RISK_HIGH, RISK_MEDIUM, RISK_LOW = 0, 1, 2
+RISK_LABELS = np.array(['🔴 High Risk', '🟡 Medium Risk', '🟢 Low Risk'])
 
 
 # ========================================
@@ -31,48 +37,60 @@ def prepare_analytics_data(questions: List[Dict], submissions: List[Dict]) -> pd
     Returns:
         pd.DataFrame: Merged data with student responses and correctness
     """
-    # Create questions lookup
     questions_df = pd.DataFrame(questions)
-    questions_lookup = {q['id']: q for q in questions}
     
-    # Prepare student response data
-    response_data = []
+    # Flatten every submission's answers into one long response table,
+    # column by column: answer keys/values are chained and the per-submission
+    # fields are repeated once per answer
+    answer_counts = np.fromiter((len(s['answers']) for s in submissions), dtype=np.intp, count=len(submissions))
     
-    for submission in submissions:
-        student_name = submission['student_name']
-        answers = submission['answers']
-        
-        for question_id, selected_option in answers.items():
-            if question_id in questions_lookup:
-                question = questions_lookup[question_id]
-                is_correct = selected_option.upper() == question['correct_option'].upper()
-                
-                response_data.append({
-                    'student_name': student_name,
-                    'question_id': question_id,
-                    'question': question['question'],
-                    'topic': question['topic'],
-                    'correct_option': question['correct_option'],
-                    'selected_option': selected_option,
-                    'is_correct': is_correct,
-                    'score': submission['score'],
-                    'percentage': submission['percentage']
-                })
-    
-    if not response_data:
+    if not answer_counts.sum() or questions_df.empty:
+        return pd.DataFrame()
+    
+    responses = pd.DataFrame({
+        'student_name': np.repeat([s['student_name'] for s in submissions], answer_counts),
+        'question_id': list(chain.from_iterable(s['answers'].keys() for s in submissions)),
+        'selected_option': list(chain.from_iterable(s['answers'].values() for s in submissions)),
+        'score': np.repeat([s['score'] for s in submissions], answer_counts),
+        'percentage': np.repeat([s['percentage'] for s in submissions], answer_counts),
+    })
+    
+    # Inner join drops answers to questions that no longer exist
+    question_cols = questions_df[['id', 'question', 'topic', 'correct_option']].rename(columns={'id': 'question_id'})
+    df = responses.merge(question_cols, on='question_id', how='inner')
+    
+    if df.empty:
         return pd.DataFrame()
     
-    df = pd.DataFrame(response_data)
-    return df
+    # correct_option is uppercased at upload and answers are stored as 'A'-'D'
+    df['is_correct'] = df['selected_option'] == df['correct_option']
+    
+    return df[[
+        'student_name', 'question_id', 'question', 'topic', 'correct_option',
+        'selected_option', 'is_correct', 'score', 'percentage'
+    ]]
+
+
+def submission_percentages(submissions: List[Dict]) -> np.ndarray:
+    """
+    Percentage of every submission as one float array, in submission order.
+    
+    Args:
+        submissions: List of submission documents
+    
+    Returns:
+        np.ndarray: float64 percentages
+    """
+    return np.fromiter((s['percentage'] for s in submissions), dtype=float, count=len(submissions))
 
 
 # ========================================
 # TOPIC-WISE ANALYTICS
 # ========================================
 
-def calculate_topic_performance(questions: List[Dict], submissions: List[Dict]) -> Dict:
+def calculate_topic_table(questions: List[Dict], submissions: List[Dict]) -> pd.DataFrame:
     """
-    Calculate accuracy and statistics per topic.
+    Per-topic statistics as a columnar table, best topic first.
     
     Formula:
         Topic Accuracy = (Correct answers in topic) / (Total attempts in topic) × 100
@@ -81,6 +99,48 @@ def calculate_topic_performance(questions: List[Dict], submissions: List[Dict])
         questions: List of question documents
         submissions: List of submission documents
     
+    Returns:
+        pd.DataFrame: Columns topic, accuracy, correct, total_attempts,
+        total_questions, students_attempted (one row per topic)
+    """
+    columns = ['topic', 'accuracy', 'correct', 'total_attempts', 'total_questions', 'students_attempted']
+    df = prepare_analytics_data(questions, submissions)
+    
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    
+    # Get total questions per topic
+    questions_per_topic = pd.DataFrame(questions).groupby('topic').size()
+    
+    # One grouped pass instead of filtering the frame once per topic
+    table = df.groupby('topic', sort=False).agg(
+        correct=('is_correct', 'sum'),
+        total_attempts=('is_correct', 'size'),
+        students_attempted=('student_name', 'nunique')
+    )
+    table['accuracy'] = (table['correct'] / table['total_attempts'] * 100).round(2)
+    table['total_questions'] = questions_per_topic.reindex(table.index, fill_value=0)
+    
+    return (
+        table.reset_index()[columns]
+        .sort_values('accuracy', ascending=False, kind='stable')
+        .reset_index(drop=True)
+    )
+
+
+def calculate_topic_performance(
+    questions: List[Dict],
+    submissions: List[Dict],
+    topic_table: Optional[pd.DataFrame] = None
+) -> Dict:
+    """
+    Calculate accuracy and statistics per topic.
+    
+    Args:
+        questions: List of question documents
+        submissions: List of submission documents
+        topic_table: Output from calculate_topic_table(), if already computed
+    
     Returns:
         dict: {
             topic_name: {
@@ -92,79 +152,78 @@ def calculate_topic_performance(questions: List[Dict], submissions: List[Dict])
             }
         }
     """
-    df = prepare_analytics_data(questions, submissions)
+    if topic_table is None:
+        topic_table = calculate_topic_table(questions, submissions)
     
-    if df.empty:
-        return {}
-    
-    topic_stats = {}
-    
-    # Get total questions per topic
-    questions_per_topic = pd.DataFrame(questions).groupby('topic').size().to_dict()
+    return topic_table.set_index('topic').to_dict('index')
+
+
+def sort_topics_by_accuracy(topic_performance: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Topic names and accuracies in one ascending (stable) accuracy order.
     
-    for topic in df['topic'].unique():
-        topic_data = df[df['topic'] == topic]
-        
-        correct_count = topic_data['is_correct'].sum()
-        total_attempts = len(topic_data)
-        accuracy = (correct_count / total_attempts * 100) if total_attempts > 0 else 0
-        students_attempted = topic_data['student_name'].nunique()
-        
-        topic_stats[topic] = {
-            'accuracy': round(accuracy, 2),
-            'correct': int(correct_count),
-            'total_attempts': int(total_attempts),
-            'total_questions': questions_per_topic.get(topic, 0),
-            'students_attempted': students_attempted
-        }
+    Args:
+        topic_performance: Output from calculate_topic_performance()
     
-    return topic_stats
+    Returns:
+        tuple: (topics np.ndarray[str], accuracies np.ndarray[float])
+    """
+    topics = np.array(list(topic_performance.keys()), dtype=object)
+    accuracies = np.fromiter(
+        (stats['accuracy'] for stats in topic_performance.values()),
+        dtype=float,
+        count=len(topic_performance)
+    )
+    order = np.argsort(accuracies, kind='stable')
+    return topics[order], accuracies[order]
 
 
-def identify_weak_topics(topic_performance: Dict, threshold: float = 60.0) -> List[Tuple[str, float]]:
+def identify_weak_topics(
+    topic_performance: Dict,
+    threshold: float = 60.0,
+    sorted_topics: Optional[Tuple[np.ndarray, np.ndarray]] = None
+) -> List[Tuple[str, float]]:
     """
     Identify topics where class performance is below threshold.
     
     Args:
         topic_performance: Output from calculate_topic_performance()
         threshold: Percentage below which a topic is considered weak
+        sorted_topics: Output from sort_topics_by_accuracy(), if already computed
     
     Returns:
         list: [(topic_name, accuracy), ...] sorted by accuracy ascending
     """
-    weak_topics = [
-        (topic, stats['accuracy'])
-        for topic, stats in topic_performance.items()
-        if stats['accuracy'] < threshold
-    ]
+    topics, accuracies = sorted_topics or sort_topics_by_accuracy(topic_performance)
     
-    # Sort by accuracy (worst first)
-    weak_topics.sort(key=lambda x: x[1])
+    # Worst first: everything before the first accuracy >= threshold
+    end = np.searchsorted(accuracies, threshold, side='left')
     
-    return weak_topics
+    return list(zip(topics[:end].tolist(), accuracies[:end].tolist()))
 
 
-def identify_strong_topics(topic_performance: Dict, threshold: float = 80.0) -> List[Tuple[str, float]]:
+def identify_strong_topics(
+    topic_performance: Dict,
+    threshold: float = 80.0,
+    sorted_topics: Optional[Tuple[np.ndarray, np.ndarray]] = None
+) -> List[Tuple[str, float]]:
     """
     Identify topics where class performance exceeds threshold.
     
     Args:
         topic_performance: Output from calculate_topic_performance()
         threshold: Percentage above which a topic is considered strong
+        sorted_topics: Output from sort_topics_by_accuracy(), if already computed
     
     Returns:
         list: [(topic_name, accuracy), ...] sorted by accuracy descending
     """
-    strong_topics = [
-        (topic, stats['accuracy'])
-        for topic, stats in topic_performance.items()
-        if stats['accuracy'] >= threshold
-    ]
+    topics, accuracies = sorted_topics or sort_topics_by_accuracy(topic_performance)
     
-    # Sort by accuracy (best first)
-    strong_topics.sort(key=lambda x: x[1], reverse=True)
+    # Best first: everything from the first accuracy >= threshold, reversed
+    start = np.searchsorted(accuracies, threshold, side='left')
     
-    return strong_topics
+    return list(zip(topics[start:][::-1].tolist(), accuracies[start:][::-1].tolist()))
 
 
 # ========================================
@@ -174,7 +233,8 @@ def identify_strong_topics(topic_performance: Dict, threshold: float = 80.0) ->
 def classify_student_risk(
     submissions: List[Dict],
     high_risk_threshold: float = 40.0,
-    medium_risk_threshold: float = 65.0
+    medium_risk_threshold: float = 65.0,
+    percentages: Optional[np.ndarray] = None
 ) -> Dict:
     """
     Classify students into risk categories based on performance.
@@ -184,16 +244,26 @@ def classify_student_risk(
         - Medium Risk: 40-65% (Needs support)
         - Low Risk: > 65% (On track)
     
+    Students are stored column-wise (one array per field) ordered high risk
+    first, then medium, then low; worst score first within high/medium and
+    best first within low.
+    
     Args:
         submissions: List of submission documents
         high_risk_threshold: Upper bound for high risk (default: 40%)
         medium_risk_threshold: Upper bound for medium risk (default: 65%)
+        percentages: Output from submission_percentages(), if already computed
     
     Returns:
         dict: {
-            'high_risk': [{'name': str, 'percentage': float}, ...],
-            'medium_risk': [...],
-            'low_risk': [...],
+            'students': {
+                'names': np.ndarray[str],
+                'percentages': np.ndarray[float],
+                'scores': np.ndarray[int],
+                'totals': np.ndarray[int],
+                'risk_codes': np.ndarray[int8] (0=high, 1=medium, 2=low),
+                'risk': np.ndarray[str] (display label from RISK_LABELS)
+            },
             'stats': {
                 'high_risk_count': int,
                 'medium_risk_count': int,
@@ -202,40 +272,40 @@ def classify_student_risk(
             }
         }
     """
-    high_risk = []
-    medium_risk = []
-    low_risk = []
-    
-    for submission in submissions:
-        student_data = {
-            'name': submission['student_name'],
-            'percentage': submission['percentage'],
-            'score': submission['score'],
-            'total': submission['total_questions']
-        }
-        
-        percentage = submission['percentage']
-        
-        if percentage < high_risk_threshold:
-            high_risk.append(student_data)
-        elif percentage < medium_risk_threshold:
-            medium_risk.append(student_data)
-        else:
-            low_risk.append(student_data)
-    
-    # Sort each category by percentage (worst first for high/medium, best first for low)
-    high_risk.sort(key=lambda x: x['percentage'])
-    medium_risk.sort(key=lambda x: x['percentage'])
-    low_risk.sort(key=lambda x: x['percentage'], reverse=True)
+    # Fixed-width unicode keeps every column a flat buffer, so cached copies
+    # serialise without pickling each name as a separate object
+    names = np.array([s['student_name'] for s in submissions], dtype=str)
+    if percentages is None:
+        percentages = submission_percentages(submissions)
+    scores = np.array([s['score'] for s in submissions], dtype=int)
+    totals = np.array([s['total_questions'] for s in submissions], dtype=int)
+    
+    risk_codes = np.select(
+        [percentages < high_risk_threshold, percentages < medium_risk_threshold],
+        [RISK_HIGH, RISK_MEDIUM],
+        default=RISK_LOW
+    ).astype(np.int8)
+    
+    # Group by risk level, then ascending score except for low risk (descending)
+    sort_key = np.where(risk_codes == RISK_LOW, -percentages, percentages)
+    order = np.lexsort((sort_key, risk_codes))
+    risk_codes = risk_codes[order]
+    
+    counts = np.bincount(risk_codes, minlength=3)
     
     return {
-        'high_risk': high_risk,
-        'medium_risk': medium_risk,
-        'low_risk': low_risk,
+        'students': {
+            'names': names[order],
+            'percentages': percentages[order],
+            'scores': scores[order],
+            'totals': totals[order],
+            'risk_codes': risk_codes,
+            'risk': RISK_LABELS[risk_codes]
+        },
         'stats': {
-            'high_risk_count': len(high_risk),
-            'medium_risk_count': len(medium_risk),
-            'low_risk_count': len(low_risk),
+            'high_risk_count': int(counts[RISK_HIGH]),
+            'medium_risk_count': int(counts[RISK_MEDIUM]),
+            'low_risk_count': int(counts[RISK_LOW]),
             'total_students': len(submissions)
         }
     }
@@ -247,7 +317,7 @@ def classify_student_risk(
 # CLASS READINESS INDICATOR
 # ========================================
 
-def calculate_class_readiness(submissions: List[Dict]) -> Dict:
+def calculate_class_readiness(submissions: List[Dict], percentages: Optional[np.ndarray] = None) -> Dict:
     """
     Calculate overall class readiness score and status.
     
@@ -265,6 +335,7 @@ def calculate_class_readiness(submissions: List[Dict]) -> Dict:
     
     Args:
         submissions: List of submission documents
+        percentages: Output from submission_percentages(), if already computed
     
     Returns:
         dict: {
@@ -288,15 +359,16 @@ def calculate_class_readiness(submissions: List[Dict]) -> Dict:
             'recommendation': 'No submissions to analyze'
         }
     
-    percentages = [s['percentage'] for s in submissions]
+    if percentages is None:
+        percentages = submission_percentages(submissions)
     
     # Base metrics
-    avg_percentage = np.mean(percentages)
-    std_dev = np.std(percentages)
+    avg_percentage = percentages.mean()
+    std_dev = percentages.std()
     
     # Calculate proportions
-    high_performers = sum(1 for p in percentages if p >= 70)
-    at_risk_students = sum(1 for p in percentages if p < 40)
+    high_performers = int(np.count_nonzero(percentages >= 70))
+    at_risk_students = int(np.count_nonzero(percentages < 40))
     
     high_performers_pct = (high_performers / len(submissions)) * 100
     at_risk_pct = (at_risk_students / len(submissions)) * 100
@@ -343,12 +415,13 @@ def calculate_class_readiness(submissions: List[Dict]) -> Dict:
 # STATISTICAL SUMMARIES
 # ========================================
 
-def calculate_test_statistics(submissions: List[Dict]) -> Dict:
+def calculate_test_statistics(submissions: List[Dict], percentages: Optional[np.ndarray] = None) -> Dict:
     """
     Calculate basic statistical measures for the test.
     
     Args:
         submissions: List of submission documents
+        percentages: Output from submission_percentages(), if already computed
     
     Returns:
         dict: {
@@ -364,18 +437,22 @@ def calculate_test_statistics(submissions: List[Dict]) -> Dict:
     if not submissions:
         return {}
     
-    percentages = [s['percentage'] for s in submissions]
+    if percentages is None:
+        percentages = submission_percentages(submissions)
+    
+    # One partition pass gives min, quartiles and max together
+    min_score, q1, median, q3, max_score = np.percentile(percentages, [0, 25, 50, 75, 100])
     
     return {
-        'mean': round(np.mean(percentages), 2),
-        'median': round(np.median(percentages), 2),
-        'std_deviation': round(np.std(percentages), 2),
-        'min_score': round(min(percentages), 2),
-        'max_score': round(max(percentages), 2),
+        'mean': round(percentages.mean(), 2),
+        'median': round(median, 2),
+        'std_deviation': round(percentages.std(), 2),
+        'min_score': round(min_score, 2),
+        'max_score': round(max_score, 2),
         'quartiles': {
-            'Q1': round(np.percentile(percentages, 25), 2),
-            'Q2': round(np.percentile(percentages, 50), 2),
-            'Q3': round(np.percentile(percentages, 75), 2)
+            'Q1': round(q1, 2),
+            'Q2': round(median, 2),
+            'Q3': round(q3, 2)
         }
     }
 
@@ -383,13 +460,19 @@ def calculate_test_statistics(submissions: List[Dict]) -> Dict:
 # COMPARATIVE ANALYTICS
 # ========================================
 
-def compare_student_to_class(student_submission: Dict, all_submissions: List[Dict]) -> Dict:
+def compare_student_to_class(
+    student_submission: Dict,
+    all_submissions: List[Dict],
+    sorted_percentages: Optional[np.ndarray] = None
+) -> Dict:
     """
     Compare a single student's performance to class average.
     
     Args:
         student_submission: Single submission document
         all_submissions: All submissions including the student's
+        sorted_percentages: np.sort(submission_percentages(all_submissions)),
+            so callers comparing many students sort only once
     
     Returns:
         dict: {
@@ -403,17 +486,19 @@ def compare_student_to_class(student_submission: Dict, all_submissions: List[Dic
         }
     """
     student_pct = student_submission['percentage']
-    all_percentages = [s['percentage'] for s in all_submissions]
+    if sorted_percentages is None:
+        sorted_percentages = np.sort(submission_percentages(all_submissions))
+    n = len(sorted_percentages)
     
-    class_avg = np.mean(all_percentages)
+    class_avg = sorted_percentages.mean()
     difference = student_pct - class_avg
     
-    # Calculate percentile
-    percentile = (sum(1 for p in all_percentages if p <= student_pct) / len(all_percentages)) * 100
+    # Scores at or below the student's, found by binary search
+    at_or_below = int(np.searchsorted(sorted_percentages, student_pct, side='right'))
+    percentile = (at_or_below / n) * 100
     
-    # Calculate rank
-    sorted_scores = sorted(all_percentages, reverse=True)
-    rank = sorted_scores.index(student_pct) + 1
+    # Rank = 1 + number of strictly higher scores (ties share a rank)
+    rank = n - at_or_below + 1
     
     # Determine category
     if percentile >= 75:
@@ -458,28 +543,31 @@ def generate_comprehensive_analytics(questions: List[Dict], submissions: List[Di
             'has_data': False
         }
     
+    topic_table = calculate_topic_table(questions, submissions)
+    topic_performance = calculate_topic_performance(questions, submissions, topic_table)
+    sorted_topics = sort_topics_by_accuracy(topic_performance)
+    percentages = submission_percentages(submissions)
+    
     analytics = {
         'has_data': True,
         'total_submissions': len(submissions),
         'total_questions': len(questions),
         
         # Topic analytics
-        'topic_performance': calculate_topic_performance(questions, submissions),
-        'weak_topics': identify_weak_topics(
-            calculate_topic_performance(questions, submissions)
-        ),
-        'strong_topics': identify_strong_topics(
-            calculate_topic_performance(questions, submissions)
-        ),
+        'topic_table': topic_table,
+        'topic_performance': topic_performance,
+        'topic_ranking': sorted_topics[0][::-1].tolist(),  # names, highest accuracy first
+        'weak_topics': identify_weak_topics(topic_performance, sorted_topics=sorted_topics),
+        'strong_topics': identify_strong_topics(topic_performance, sorted_topics=sorted_topics),
         
         # Student risk
-        'risk_classification': classify_student_risk(submissions),
+        'risk_classification': classify_student_risk(submissions, percentages=percentages),
         
         # Class readiness
-        'class_readiness': calculate_class_readiness(submissions),
+        'class_readiness': calculate_class_readiness(submissions, percentages),
         
         # Statistical summary
-        'statistics': calculate_test_statistics(submissions),
+        'statistics': calculate_test_statistics(submissions, percentages),
         
     }
     
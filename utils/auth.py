@@ -8,11 +8,124 @@ This module handles:
 - Logout functionality
 """
 
+import os
+import time
+import functools
+import hashlib
+import threading
+import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from firebase_admin import auth
 from utils.firebase import create_teacher_profile, get_teacher_profile
+from collections import OrderedDict
 from typing import Optional, Dict, Tuple
 
+# (connect, read) timeout for Firebase Auth REST calls, in seconds
+AUTH_REST_TIMEOUT = (3.05, 10)
+
+# Sign-in is the only endpoint whose gateway errors are retried
+SIGN_IN_URL_PREFIX = "https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword"
+
+
+def _build_http_session() -> requests.Session:
+    """
+    Keep-alive session for the Firebase Auth REST API.
+    
+    Reuses the TLS connection to identitytoolkit.googleapis.com across logins.
+    Gateway errors are retried for sign-in only, which is safe to repeat;
+    other calls (e.g. sendOobCode, which emails the teacher) go through an
+    adapter without retries so a retried 5xx can't send a second email.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"})
+    )
+    session.mount("https://", HTTPAdapter(max_retries=0))
+    # Longest matching prefix wins, so sign-in requests use this adapter
+    session.mount(SIGN_IN_URL_PREFIX, HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+    return session
+
+
+_http = _build_http_session()
+
+
+@functools.cache
+def _web_api_key() -> Optional[str]:
+    """
+    Firebase Web API key, resolved once per process.
+    
+    Environment variable first, then Streamlit secrets.
+    """
+    api_key = os.getenv('FIREBASE_WEB_API_KEY')
+    if not api_key and hasattr(st, 'secrets'):
+        try:
+            api_key = st.secrets.get('FIREBASE_WEB_API_KEY')
+        except Exception:
+            pass
+    return api_key
+
+
+def _warm_up_connection():
+    """Open the TLS connection to identitytoolkit ahead of the first login."""
+    try:
+        # Through the sign-in adapter, so the warmed connection lands in its pool
+        _http.head(SIGN_IN_URL_PREFIX, timeout=AUTH_REST_TIMEOUT)
+    except requests.RequestException:
+        pass  # Only a head start; the first login opens it otherwise
+
+
+# In the background, so importing this module (and painting the login page) doesn't wait on it.
+# Only when a Web API key is configured; otherwise no REST call will ever use the connection
+if _web_api_key():
+    threading.Thread(target=_warm_up_connection, daemon=True).start()
+
+
+# Emails recently reported as unknown, so retyped passwords for them skip
+# the sign-in round trip: sha1(email) -> time recorded
+UNKNOWN_EMAIL_TTL = 30  # seconds
+UNKNOWN_EMAIL_CACHE_SIZE = 1024
+_unknown_emails: "OrderedDict[str, float]" = OrderedDict()
+_unknown_emails_lock = threading.Lock()
+
+
+def _email_key(email: str) -> str:
+    """Cache key for an email, so addresses aren't held in memory as-is."""
+    return hashlib.sha1(email.strip().lower().encode()).hexdigest()
+
+
+def _is_known_unknown_email(email: str) -> bool:
+    """True if the email was reported as not found within the last UNKNOWN_EMAIL_TTL seconds."""
+    key = _email_key(email)
+    with _unknown_emails_lock:
+        recorded = _unknown_emails.get(key)
+        if recorded is None:
+            return False
+        if time.monotonic() - recorded > UNKNOWN_EMAIL_TTL:
+            del _unknown_emails[key]
+            return False
+        return True
+
+
+def _remember_unknown_email(email: str):
+    """Record an email the sign-in API reported as not found."""
+    key = _email_key(email)
+    with _unknown_emails_lock:
+        _unknown_emails[key] = time.monotonic()
+        _unknown_emails.move_to_end(key)
+        if len(_unknown_emails) > UNKNOWN_EMAIL_CACHE_SIZE:
+            _unknown_emails.popitem(last=False)
+
+
+def _forget_unknown_email(email: str):
+    """Drop an email from the unknown cache (it now has an account)."""
+    with _unknown_emails_lock:
+        _unknown_emails.pop(_email_key(email), None)
+
 
 # ========================================
 # SESSION STATE MANAGEMENT
@@ -104,6 +217,7 @@ def signup_teacher(email: str, password: str) -> Tuple[bool, str]:
             auth.delete_user(user.uid)
             return False, "Failed to create teacher profile"
         
+        _forget_unknown_email(email)
         return True, "Account created successfully!"
     
     except auth.EmailAlreadyExistsError:
@@ -134,46 +248,25 @@ def login_teacher(email: str, password: str) -> Tuple[bool, str]:
             return False, "Email and password are required"
         
         # Use Firebase Auth REST API for password verification
-        import requests
-        import os
-        
-        # Get Firebase Web API Key from environment or Streamlit secrets
-        api_key = os.getenv('FIREBASE_WEB_API_KEY')
-        
-        # Try Streamlit secrets if env var not found
-        if not api_key and hasattr(st, 'secrets'):
-            try:
-                api_key = st.secrets.get('FIREBASE_WEB_API_KEY')
-            except Exception:
-                pass
+        api_key = _web_api_key()
         
         if not api_key:
-            # For development, try to get from Firebase project
-            # In production, set this in Streamlit secrets
-            st.warning("FIREBASE_WEB_API_KEY not set. Using simplified auth for development.")
-            # Simplified approach: just check if user exists
-            user = auth.get_user_by_email(email)
-            
-            # Update session state
-            st.session_state.authenticated = True
-            st.session_state.user_id = user.uid
-            st.session_state.user_email = email
-            
-            # Load user profile
-            profile = get_teacher_profile(user.uid)
-            st.session_state.user_profile = profile
-            
-            return True, "Login successful!"
+            # Never fall back to an unchecked login; passwords can only be
+            # verified through the REST API
+            return False, "Login not configured. Please contact admin."
+        
+        if _is_known_unknown_email(email):
+            return False, "No account found with this email"
         
-        # Production approach: verify with REST API
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
+        # Verify with REST API
+        url = f"{SIGN_IN_URL_PREFIX}?key={api_key}"
         payload = {
             "email": email,
             "password": password,
             "returnSecureToken": True
         }
         
-        response = requests.post(url, json=payload)
+        response = _http.post(url, json=payload, timeout=AUTH_REST_TIMEOUT)
         
         if response.status_code == 200:
             data = response.json()
@@ -196,13 +289,11 @@ def login_teacher(email: str, password: str) -> Tuple[bool, str]:
             if 'INVALID_PASSWORD' in error_message:
                 return False, "Invalid email or password"
             elif 'EMAIL_NOT_FOUND' in error_message:
+                _remember_unknown_email(email)
                 return False, "No account found with this email"
             else:
                 return False, f"Login failed: {error_message}"
     
-    except auth.UserNotFoundError:
-        return False, "No account found with this email"
-    
     except Exception as e:
         return False, f"Login failed: {str(e):.15}"
 
@@ -211,15 +302,9 @@ def logout_teacher():
     """
     Log out the current teacher by clearing session state.
     """
-    st.session_state.authenticated = False
-    st.session_state.user_id = None
-    st.session_state.user_email = None
-    st.session_state.user_profile = None
-    
-    # Clear any other session data
-    for key in list(st.session_state.keys()):
-        if key not in ['authenticated', 'user_id', 'user_email', 'user_profile']:
-            del st.session_state[key]
+    # Drop all session data, then restore the logged-out auth defaults
+    st.session_state.clear()
+    init_session_state()
 
 
 # ========================================
@@ -259,17 +344,7 @@ def send_password_reset_email(email: str) -> Tuple[bool, str]:
         tuple: (success: bool, message: str)
     """
     try:
-        import requests
-        import os
-        
-        api_key = os.getenv('FIREBASE_WEB_API_KEY')
-        
-        # Try Streamlit secrets if env var not found
-        if not api_key and hasattr(st, 'secrets'):
-            try:
-                api_key = st.secrets.get('FIREBASE_WEB_API_KEY')
-            except Exception:
-                pass
+        api_key = _web_api_key()
         
         if not api_key:
             return False, "Password reset not configured. Please contact admin."
@@ -280,7 +355,7 @@ def send_password_reset_email(email: str) -> Tuple[bool, str]:
             "email": email
         }
         
-        response = requests.post(url, json=payload)
+        response = _http.post(url, json=payload, timeout=AUTH_REST_TIMEOUT)
         
         if response.status_code == 200:
             return True, "Password reset email sent! Check your inbox."
@@ -10,11 +10,57 @@ This module handles:
 
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
+from google.api_core.exceptions import AlreadyExists
+import functools
+import hmac
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator, Union
+import pandas as pd
 import streamlit as st
 
+# Maximum number of writes Firestore accepts in a single WriteBatch
+FIRESTORE_BATCH_LIMIT = 500
+
+# Number of WriteBatch commits allowed in flight at once
+BATCH_COMMIT_WORKERS = 8
+
+# Maximum number of values Firestore accepts in a single 'in' filter
+FIRESTORE_IN_LIMIT = 30
+
+
+@functools.cache
+def _build_credential() -> credentials.Certificate:
+    """
+    Resolve the service account credential once per process.
+    
+    Sources, in order:
+        1. FIREBASE_CREDENTIALS env var holding the JSON (Hugging Face)
+        2. FIREBASE_CREDENTIALS_PATH from a local .env
+        3. firebase-credentials.json in the project root
+    
+    Returns:
+        credentials.Certificate: Parsed service account credential
+    """
+    firebase_json = os.getenv("FIREBASE_CREDENTIALS")
+    if firebase_json:
+        return credentials.Certificate(json.loads(firebase_json))
+    
+    if os.path.exists(".env"):
+        from dotenv import load_dotenv
+        load_dotenv()
+        creds_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
+        if creds_path and os.path.exists(creds_path):
+            return credentials.Certificate(creds_path)
+    
+    if os.path.exists("firebase-credentials.json"):
+        return credentials.Certificate("firebase-credentials.json")
+    
+    raise FileNotFoundError("Firebase credentials not found")
+
 
 class FirebaseManager:
     """
@@ -25,6 +71,7 @@ class FirebaseManager:
     _instance = None
     _db = None
     _initialized = False
+    _init_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -90,41 +137,23 @@ class FirebaseManager:
     #         raise
     
     def _initialize_firebase(self):
-        try:
-            if not firebase_admin._apps:
-                # 1. ENV VAR (Hugging Face)
-                firebase_json = os.getenv("FIREBASE_CREDENTIALS")
-                if firebase_json:
-                    import json
-                    cred = credentials.Certificate(json.loads(firebase_json))
-                    firebase_admin.initialize_app(cred)
-                    FirebaseManager._db = firestore.client()
-                    return
-
-                # 2. Local .env
-                if os.path.exists(".env"):
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    creds_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
-                    if creds_path and os.path.exists(creds_path):
-                        cred = credentials.Certificate(creds_path)
-                        firebase_admin.initialize_app(cred)
-                        FirebaseManager._db = firestore.client()
-                        return
-
-                # 3. Local JSON fallback
-                if os.path.exists("firebase-credentials.json"):
-                    cred = credentials.Certificate("firebase-credentials.json")
-                    firebase_admin.initialize_app(cred)
-                    FirebaseManager._db = firestore.client()
-                    return
-
-                raise FileNotFoundError("Firebase credentials not found")
-
-            FirebaseManager._db = firestore.client()
-
-        except Exception as e:
-            raise RuntimeError(f"Firebase initialization failed: {e}")
+        """
+        Initialize Firebase Admin SDK and the Firestore client once.
+        
+        Serialized by a lock: concurrent first runs on Streamlit script
+        threads would otherwise both call initialize_app, and the second
+        raises ValueError.
+        """
+        with FirebaseManager._init_lock:
+            if FirebaseManager._db is not None:
+                return
+            
+            try:
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(_build_credential())
+                FirebaseManager._db = firestore.client()
+            except Exception as e:
+                raise RuntimeError(f"Firebase initialization failed: {e}")
 
 
     @property
@@ -224,8 +253,11 @@ def create_test(teacher_id: str, test_data: Dict) -> Optional[str]:
         
         # Add required fields
         test_data['teacher_id'] = teacher_id
+        # Stored uppercase so validation compares student input directly
+        test_data['access_code'] = test_data['access_code'].strip().upper()
         test_data['created_at'] = firestore.SERVER_TIMESTAMP
         test_data['status'] = 'active'
+        test_data['submission_count'] = 0
         
         # Create test document
         test_ref = db.collection('tests').document()
@@ -252,13 +284,7 @@ def get_tests_by_teacher(teacher_id: str) -> List[Dict]:
         tests_ref = db.collection('tests').where('teacher_id', '==', teacher_id)
         tests = tests_ref.order_by('created_at', direction=firestore.Query.DESCENDING).stream()
         
-        result = []
-        for test in tests:
-            test_data = test.to_dict()
-            test_data['id'] = test.id
-            result.append(test_data)
-        
-        return result
+        return [{**test.to_dict(), 'id': test.id} for test in tests]
     except Exception as e:
         st.error(f"Error fetching tests: {str(e)}")
         return []
@@ -287,24 +313,34 @@ def get_test_by_id(test_id: str) -> Optional[Dict]:
         return None
 
 
-def validate_access_code(test_id: str, access_code: str) -> bool:
+def validate_access_code(test_id: str, access_code: str, test: Optional[Dict] = None) -> bool:
     """
     Validate student access code for a test.
     
     Args:
         test_id: Test document ID
         access_code: Code provided by student
+        test: Already-fetched test document; skips the Firestore read when given
     
     Returns:
         bool: True if code is valid and test is active
     """
     try:
-        test = get_test_by_id(test_id)
+        if test is None:
+            # Only the fields checked below are fetched
+            doc = firebase_manager.db.collection('tests').document(test_id).get(
+                field_paths=['access_code', 'expiry_time', 'status']
+            )
+            test = doc.to_dict() if doc.exists else None
         if not test:
             return False
         
-        # Check access code (case-insensitive)
-        if test['access_code'].upper() != access_code.upper():
+        # Check access code (case-insensitive, constant-time); stored codes
+        # are uppercased by create_test
+        if not hmac.compare_digest(
+            test['access_code'].encode(),
+            access_code.strip().upper().encode()
+        ):
             return False
         
         # Check if test has expired (primary check)
@@ -330,29 +366,68 @@ def validate_access_code(test_id: str, access_code: str) -> bool:
 # QUESTION OPERATIONS
 # ========================================
 
-def create_questions_batch(test_id: str, questions: List[Dict]) -> bool:
+def _iter_question_chunks(
+    questions: Union[pd.DataFrame, List[Dict]],
+    chunk_size: int = FIRESTORE_BATCH_LIMIT
+) -> Iterator[List[Dict]]:
+    """
+    Yield questions as lists of dicts, one Firestore batch at a time.
+    
+    DataFrames are only converted to records slice by slice, so at most
+    one batch worth of dicts exists at any point.
+    """
+    for start in range(0, len(questions), chunk_size):
+        if isinstance(questions, pd.DataFrame):
+            yield questions.iloc[start:start + chunk_size].to_dict('records')
+        else:
+            yield questions[start:start + chunk_size]
+
+
+def _commit_question_chunk(db, test_id: str, chunk: List[Dict], first_number: int) -> None:
+    """Write one chunk of questions as a single WriteBatch commit."""
+    batch = db.batch()
+    
+    for offset, question in enumerate(chunk):
+        question['test_id'] = test_id
+        question['question_number'] = first_number + offset
+        
+        question_ref = db.collection('questions').document()
+        batch.set(question_ref, question)
+    
+    batch.commit()
+
+
+def create_questions_batch(test_id: str, questions: Union[pd.DataFrame, List[Dict]]) -> bool:
     """
     Create multiple questions for a test in a batch operation.
     
+    Questions are split into WriteBatch-sized chunks whose commits run
+    concurrently, with at most BATCH_COMMIT_WORKERS chunks in flight.
+    
     Args:
         test_id: Parent test document ID
-        questions: List of question dictionaries
+        questions: Validated questions DataFrame or list of question dictionaries
     
     Returns:
         bool: True if all questions created successfully
     """
     try:
         db = firebase_manager.db
-        batch = db.batch()
+        pending = set()
         
-        for idx, question in enumerate(questions, start=1):
-            question['test_id'] = test_id
-            question['question_number'] = idx
+        with ThreadPoolExecutor(max_workers=BATCH_COMMIT_WORKERS) as pool:
+            for chunk_idx, chunk in enumerate(_iter_question_chunks(questions)):
+                if len(pending) >= BATCH_COMMIT_WORKERS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                
+                first_number = chunk_idx * FIRESTORE_BATCH_LIMIT + 1
+                pending.add(pool.submit(_commit_question_chunk, db, test_id, chunk, first_number))
             
-            question_ref = db.collection('questions').document()
-            batch.set(question_ref, question)
+            for future in pending:
+                future.result()
         
-        batch.commit()
         return True
     except Exception as e:
         st.error(f"Error creating questions: {str(e)}")
@@ -374,13 +449,7 @@ def get_questions_by_test(test_id: str) -> List[Dict]:
         questions_ref = db.collection('questions').where('test_id', '==', test_id)
         questions = questions_ref.order_by('question_number').stream()
         
-        result = []
-        for question in questions:
-            question_data = question.to_dict()
-            question_data['id'] = question.id
-            result.append(question_data)
-        
-        return result
+        return [{**question.to_dict(), 'id': question.id} for question in questions]
     except Exception as e:
         st.error(f"Error fetching questions: {str(e)}")
         return []
@@ -390,14 +459,25 @@ def get_questions_by_test(test_id: str) -> List[Dict]:
 # SUBMISSION OPERATIONS
 # ========================================
 
-def create_submission(submission_data: Dict) -> Optional[str]:
+def create_submission(submission_data: Dict, submission_id: Optional[str] = None) -> Optional[str]:
     """
     Create a new submission document.
     
+    The parent test's submission_count and last_submission_at are updated
+    in the same transaction, so the insert and the counters commit together.
+    Tests created before submission_count existed have no counter yet; the
+    first submission seeds it from a count() aggregation of the existing
+    submissions instead of starting it at 1.
+    
+    Passing a client-chosen submission_id makes retries idempotent: the
+    document is written with create(), so if an earlier attempt actually
+    landed the whole transaction is rejected and the counter is not bumped twice.
+    
     Args:
         submission_data: Dictionary containing submission details
             Required keys: test_id, student_name, answers, score, percentage, 
                           total_questions, time_taken
+        submission_id: Optional document ID to write to (stable across retries)
     
     Returns:
         str: Submission document ID if successful, None otherwise
@@ -407,21 +487,46 @@ def create_submission(submission_data: Dict) -> Optional[str]:
         
         submission_data['submitted_at'] = firestore.SERVER_TIMESTAMP
         
-        submission_ref = db.collection('submissions').document()
-        submission_ref.set(submission_data)
+        submissions_ref = db.collection('submissions')
+        submission_ref = submissions_ref.document(submission_id)
+        test_ref = db.collection('tests').document(submission_data['test_id'])
+        
+        @firestore.transactional
+        def _write(transaction):
+            # Reading the test inside the transaction makes concurrent first
+            # submissions conflict, so only one of them seeds the counter
+            test = test_ref.get(field_paths=['submission_count'], transaction=transaction)
+            if (test.to_dict() or {}).get('submission_count') is not None:
+                submission_count = firestore.Increment(1)
+            else:
+                existing = submissions_ref.where('test_id', '==', submission_data['test_id']).count().get()
+                submission_count = int(existing[0][0].value) + 1
+            
+            transaction.create(submission_ref, submission_data)
+            transaction.update(test_ref, {
+                'submission_count': submission_count,
+                'last_submission_at': firestore.SERVER_TIMESTAMP
+            })
         
+        _write(db.transaction())
+        
+        return submission_ref.id
+    except AlreadyExists:
+        # A previous attempt committed but its response was lost
         return submission_ref.id
     except Exception as e:
         st.error(f"Error creating submission: {str(e)}")
         return None
 
 
-def get_submissions_by_test(test_id: str) -> List[Dict]:
+def get_submissions_by_test(test_id: str, fields: Optional[List[str]] = None) -> List[Dict]:
     """
     Retrieve all submissions for a specific test.
     
     Args:
         test_id: Test document ID
+        fields: Only fetch these fields (e.g. leave out the answers map
+            when listing students); all fields when None
     
     Returns:
         list: List of submission documents with their IDs
@@ -429,15 +534,11 @@ def get_submissions_by_test(test_id: str) -> List[Dict]:
     try:
         db = firebase_manager.db
         submissions_ref = db.collection('submissions').where('test_id', '==', test_id)
+        if fields:
+            submissions_ref = submissions_ref.select(fields)
         submissions = submissions_ref.order_by('submitted_at', direction=firestore.Query.DESCENDING).stream()
         
-        result = []
-        for submission in submissions:
-            submission_data = submission.to_dict()
-            submission_data['id'] = submission.id
-            result.append(submission_data)
-        
-        return result
+        return [{**submission.to_dict(), 'id': submission.id} for submission in submissions]
     except Exception as e:
         st.error(f"Error fetching submissions: {str(e)}")
         return []
@@ -447,6 +548,10 @@ def get_submission_count(test_id: str) -> int:
     """
     Get the number of submissions for a test.
     
+    Read from the test's submission_count field, which create_submission
+    increments; tests created before that field existed are counted
+    server-side with an aggregation query instead.
+    
     Args:
         test_id: Test document ID
     
@@ -455,8 +560,64 @@ def get_submission_count(test_id: str) -> int:
     """
     try:
         db = firebase_manager.db
-        submissions = db.collection('submissions').where('test_id', '==', test_id).stream()
-        return sum(1 for _ in submissions)
+        test = db.collection('tests').document(test_id).get(field_paths=['submission_count'])
+        count = (test.to_dict() or {}).get('submission_count')
+        if count is not None:
+            return int(count)
+        
+        result = db.collection('submissions').where('test_id', '==', test_id).count().get()
+        return int(result[0][0].value)
+    except Exception as e:
+        st.error(f"Error counting submissions: {str(e)}")
+        return 0
+
+
+def _count_submission_chunk(db, chunk: List[str]) -> Dict[str, int]:
+    """Count submissions for up to FIRESTORE_IN_LIMIT tests with one query."""
+    counts = dict.fromkeys(chunk, 0)
+    submissions = (
+        db.collection('submissions')
+        .where('test_id', 'in', chunk)
+        .select(['test_id'])
+        .stream()
+    )
+    for submission in submissions:
+        counts[submission.get('test_id')] += 1
+    return counts
+
+
+def get_submission_counts(test_ids: List[str]) -> Dict[str, int]:
+    """
+    Get the number of submissions for several tests at once.
+    
+    Issues one query per FIRESTORE_IN_LIMIT tests (fetching only the
+    test_id field) instead of one query per test. When there is more
+    than one such query they run concurrently, so the wait is roughly
+    one round-trip rather than one per chunk.
+    
+    Args:
+        test_ids: Test document IDs
+    
+    Returns:
+        dict: {test_id: submission count}
+    """
+    counts = dict.fromkeys(test_ids, 0)
+    chunks = [
+        list(test_ids[start:start + FIRESTORE_IN_LIMIT])
+        for start in range(0, len(test_ids), FIRESTORE_IN_LIMIT)
+    ]
+    
+    try:
+        db = firebase_manager.db
+        if len(chunks) == 1:
+            counts.update(_count_submission_chunk(db, chunks[0]))
+            return counts
+        
+        with ThreadPoolExecutor(max_workers=min(len(chunks), BATCH_COMMIT_WORKERS)) as pool:
+            futures = [pool.submit(_count_submission_chunk, db, chunk) for chunk in chunks]
+            for future in futures:
+                counts.update(future.result())
+        return counts
     except Exception as e:
         st.error(f"Error counting submissions: {str(e)}")
-        return 0
\ No newline at end of file
+        return counts
@@ -0,0 +1,78 @@
+"""
+Cached Firestore Reads
+
+Thin st.cache_data wrappers around the read helpers in utils.firebase so
+that Streamlit reruns are served from memory instead of Firestore.
+
+- Dashboard and test list reads (tests, submissions, questions, counts)
+  expire after a minute
+- Exam questions are immutable once a test is created and are kept for an hour
+"""
+
+from typing import Dict, List, Optional, Tuple
+import streamlit as st
+from utils.firebase import (
+    get_test_by_id,
+    get_tests_by_teacher,
+    get_submissions_by_test,
+    get_questions_by_test,
+    get_submission_counts,
+)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_test(test_id: str) -> Optional[Dict]:
+    """Single test document, cached per test_id."""
+    return get_test_by_id(test_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_tests_by_teacher(teacher_id: str) -> List[Dict]:
+    """Teacher's tests, newest first, cached per teacher_id."""
+    return get_tests_by_teacher(teacher_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_submission_counts(test_ids: Tuple[str, ...]) -> Dict[str, int]:
+    """Submission counts for a set of tests, fetched in batched queries."""
+    return get_submission_counts(list(test_ids))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_submissions(test_id: str) -> List[Dict]:
+    """Submissions for a test, cached per test_id."""
+    return get_submissions_by_test(test_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_questions(test_id: str) -> List[Dict]:
+    """Questions for a test, cached per test_id."""
+    return get_questions_by_test(test_id)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_exam_questions(test_id: str) -> List[Dict]:
+    """
+    Questions served to students taking a test.
+
+    Shared across every student sitting the same test, so a class only
+    costs one Firestore query per hour instead of one per student.
+    """
+    return get_questions_by_test(test_id)
+
+
+def clear_cached_reads():
+    """Drop cached dashboard reads so the next run fetches fresh data."""
+    cached_test.clear()
+    cached_tests_by_teacher.clear()
+    cached_submission_counts.clear()
+    cached_submissions.clear()
+    cached_questions.clear()
+
+
+def invalidate_submission_reads():
+    """Drop cached reads that a new submission makes stale (call after the write)."""
+    cached_test.clear()
+    cached_tests_by_teacher.clear()
+    cached_submission_counts.clear()
+    cached_submissions.clear()
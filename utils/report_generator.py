@@ -9,19 +9,141 @@ from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image, KeepTogether
+    BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Table, LongTable,
+    TableStyle, PageBreak, KeepTogether
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Line, String
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
 from reportlab.graphics.charts.piecharts import Pie
 from datetime import datetime
+from collections import OrderedDict
 import io
+import json
+import hashlib
+import threading
 from typing import Dict, List, Optional
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
+
+# Rendered PDFs kept for repeat downloads of unchanged reports
+REPORT_CACHE_SIZE = 16
+
+# Palette shared by every section (parsed once, not per table)
+C_BLUE = colors.HexColor('#0066cc')
+C_TEXT = colors.HexColor('#333333')
+C_GREY_BG = colors.HexColor('#f8f9fa')
+C_BORDER = colors.HexColor('#dee2e6')
+C_RED = colors.HexColor('#dc3545')
+C_RED_BG = colors.HexColor('#f8d7da')
+C_YELLOW = colors.HexColor('#ffc107')
+C_YELLOW_BG = colors.HexColor('#fff3cd')
+C_GREEN = colors.HexColor('#28a745')
+C_GREEN_BG = colors.HexColor('#d4edda')
+C_BLUE_BG = colors.HexColor('#e7f3ff')
+
+# Readiness card (background, border, emoji) per status; anything else is Not Ready
+READINESS_STYLES = {
+    'Exam Ready': (C_GREEN_BG, C_GREEN, '🟢'),
+    'Borderline': (C_YELLOW_BG, C_YELLOW, '🟡'),
+}
+NOT_READY_STYLE = (C_RED_BG, C_RED, '🔴')
+
+# Table styles shared by every report; per-report colours are layered on
+# with a second setStyle call
+METRICS_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BACKGROUND', (0, 0), (-1, 0), C_GREY_BG),
+    ('BACKGROUND', (0, 1), (-1, 1), colors.white),
+    ('BOX', (0, 0), (-1, -1), 1, C_BORDER),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, C_BORDER),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+])
+
+READINESS_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+])
+
+TOPIC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), C_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('TOPPADDING', (0, 0), (-1, 0), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, C_GREY_BG]),
+])
+
+RISK_SUMMARY_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('BACKGROUND', (0, 0), (0, -1), C_RED_BG),
+    ('BACKGROUND', (1, 0), (1, -1), C_YELLOW_BG),
+    ('BACKGROUND', (2, 0), (2, -1), C_GREEN_BG),
+    ('BOX', (0, 0), (-1, -1), 1, colors.grey),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+])
+
+STUDENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), C_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, C_GREY_BG]),
+])
+
+INSIGHTS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), C_BLUE_BG),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BOX', (0, 0), (-1, -1), 2, C_BLUE),
+    ('INNERGRID', (0, 0), (-1, -1), 1, C_BLUE),
+    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+])
+
+
+def _ranked_topics(analytics: Dict) -> List[str]:
+    """
+    Topic names, highest accuracy first.
+    
+    Uses the ranking precomputed by generate_comprehensive_analytics() and
+    only sorts when it is missing.
+    """
+    ranking = analytics.get('topic_ranking')
+    if ranking is None:
+        topic_perf = analytics['topic_performance']
+        ranking = sorted(topic_perf, key=lambda topic: topic_perf[topic]['accuracy'], reverse=True)
+    return ranking
+
+
+def _topic_status(accuracy: float) -> str:
+    """Strong / Moderate / Weak label for a topic accuracy."""
+    if accuracy >= 75:
+        return '🟢 Strong'
+    if accuracy >= 60:
+        return '🟡 Moderate'
+    return '🔴 Weak'
+
+
+def _big_number(value, size: int = 16, color: Optional[str] = None) -> str:
+    """Markup for the large figure shown in a metric card."""
+    if color:
+        return f"<font size={size} color='{color}'><b>{value}</b></font>"
+    return f"<font size={size}><b>{value}</b></font>"
 
 
 class TestReportGenerator:
@@ -32,13 +154,20 @@ class TestReportGenerator:
         self._setup_custom_styles()
         self.width, self.height = letter
         
+        # Page geometry is the same for every report; only the Frame object
+        # itself is built per document since layout mutates it
+        self._frame_box = (
+            0.75*inch, 1*inch,                            # x, y: left and bottom margins
+            self.width - 1.5*inch, self.height - 2*inch,  # width, height
+        )
+        
     def _setup_custom_styles(self):
         """Create custom paragraph styles."""
         self.styles.add(ParagraphStyle(
             name='ReportTitle',
             parent=self.styles['Heading1'],
             fontSize=24,
-            textColor=colors.HexColor('#0066cc'),
+            textColor=C_BLUE,
             spaceAfter=20,
             alignment=TA_CENTER,
             fontName='Helvetica-Bold'
@@ -48,7 +177,7 @@ class TestReportGenerator:
             name='SectionHeading',
             parent=self.styles['Heading2'],
             fontSize=16,
-            textColor=colors.HexColor('#333333'),
+            textColor=C_TEXT,
             spaceAfter=12,
             spaceBefore=15,
             fontName='Helvetica-Bold'
@@ -58,7 +187,7 @@ class TestReportGenerator:
             name='CardText',
             parent=self.styles['Normal'],
             fontSize=10,
-            textColor=colors.HexColor('#333333'),
+            textColor=C_TEXT,
             leading=14
         ))
     
@@ -75,8 +204,9 @@ class TestReportGenerator:
         )
         elements.append(test_info)
         
+        # Date only: generate_test_report reuses a rendered PDF for the rest of the day
         date_para = Paragraph(
-            f"<i>Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</i>",
+            f"<i>Generated: {datetime.now().strftime('%B %d, %Y')}</i>",
             self.styles['Normal']
         )
         elements.append(date_para)
@@ -94,30 +224,23 @@ class TestReportGenerator:
         readiness = analytics['class_readiness']
         risk_stats = analytics['risk_classification']['stats']
         
+        card = self.styles['CardText']
+        
         # Create 4-column metrics table
         data = [[
-            Paragraph("<b>Total Students</b>", self.styles['CardText']),
-            Paragraph("<b>Average Score</b>", self.styles['CardText']),
-            Paragraph("<b>Readiness Score</b>", self.styles['CardText']),
-            Paragraph("<b>High Risk Students</b>", self.styles['CardText'])
+            Paragraph("<b>Total Students</b>", card),
+            Paragraph("<b>Average Score</b>", card),
+            Paragraph("<b>Readiness Score</b>", card),
+            Paragraph("<b>High Risk Students</b>", card)
         ], [
-            Paragraph(f"<font size=16><b>{analytics['total_submissions']}</b></font>", self.styles['CardText']),
-            Paragraph(f"<font size=16><b>{stats['mean']:.1f}%</b></font>", self.styles['CardText']),
-            Paragraph(f"<font size=16><b>{readiness['readiness_score']:.1f}/100</b></font>", self.styles['CardText']),
-            Paragraph(f"<font size=16 color='#dc3545'><b>{risk_stats['high_risk_count']}</b></font>", self.styles['CardText'])
+            Paragraph(_big_number(analytics['total_submissions']), card),
+            Paragraph(_big_number(f"{stats['mean']:.1f}%"), card),
+            Paragraph(_big_number(f"{readiness['readiness_score']:.1f}/100"), card),
+            Paragraph(_big_number(risk_stats['high_risk_count'], color='#dc3545'), card)
         ]]
         
         table = Table(data, colWidths=[1.5*inch]*4)
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f8f9fa')),
-            ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-            ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dee2e6')),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ]))
+        table.setStyle(METRICS_TABLE_STYLE)
         
         elements.append(table)
         elements.append(Spacer(1, 0.3*inch))
@@ -134,18 +257,9 @@ class TestReportGenerator:
         status = readiness['status']
         
         # Determine colors
-        if status == 'Exam Ready':
-            bg_color = colors.HexColor('#d4edda')
-            border_color = colors.HexColor('#28a745')
-            emoji = '🟢'
-        elif status == 'Borderline':
-            bg_color = colors.HexColor('#fff3cd')
-            border_color = colors.HexColor('#ffc107')
-            emoji = '🟡'
-        else:
-            bg_color = colors.HexColor('#f8d7da')
-            border_color = colors.HexColor('#dc3545')
-            emoji = '🔴'
+        bg_color, border_color, emoji = READINESS_STYLES.get(status, NOT_READY_STYLE)
+        
+        card = self.styles['CardText']
         
         # Readiness card data
         card_data = [[
@@ -156,24 +270,19 @@ class TestReportGenerator:
                 f"<b>Performance Spread:</b> {readiness['std_deviation']:.1f}% std dev<br/>"
                 f"<b>High Performers:</b> {readiness['high_performers_pct']:.1f}%<br/>"
                 f"<b>At Risk:</b> {readiness['at_risk_pct']:.1f}%",
-                self.styles['CardText']
+                card
             )
         ], [
             Paragraph(
                 f"<b>Recommendation:</b><br/>{readiness['recommendation']}",
-                self.styles['CardText']
+                card
             )
         ]]
         
         table = Table(card_data, colWidths=[6*inch])
+        table.setStyle(READINESS_TABLE_STYLE)
         table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, -1), bg_color),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
             ('BOX', (0, 0), (-1, -1), 3, border_color),
         ]))
         
@@ -182,6 +291,58 @@ class TestReportGenerator:
         
         return elements
     
+    def _topic_bar_chart(self, topic_perf: Dict) -> Drawing:
+        """Horizontal accuracy bar per topic with a dashed 60% target line."""
+        topics = list(topic_perf.keys())
+        accuracies = [stats['accuracy'] for stats in topic_perf.values()]
+        
+        # Grow with the topic count so labels don't overlap
+        height = max(3*inch, 0.3*inch*len(topics) + 1*inch)
+        drawing = Drawing(6*inch, height)
+        
+        chart = HorizontalBarChart()
+        chart.x = 1.8*inch
+        chart.y = 0.5*inch
+        chart.width = 3.9*inch
+        chart.height = height - 0.9*inch
+        chart.data = [accuracies]
+        chart.bars.strokeColor = None
+        for i, accuracy in enumerate(accuracies):
+            chart.bars[(0, i)].fillColor = C_GREEN if accuracy >= 75 else C_YELLOW if accuracy >= 60 else C_RED
+        
+        chart.categoryAxis.categoryNames = topics
+        chart.categoryAxis.labels.fontSize = 9
+        chart.categoryAxis.labels.boxAnchor = 'e'
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.valueMax = 100
+        chart.valueAxis.valueStep = 20
+        chart.valueAxis.labels.fontSize = 9
+        chart.valueAxis.visibleGrid = True
+        chart.valueAxis.gridStrokeColor = C_BORDER
+        drawing.add(chart)
+        
+        # Target line at 60%
+        target_x = chart.x + chart.width * 0.6
+        drawing.add(Line(
+            target_x, chart.y, target_x, chart.y + chart.height,
+            strokeColor=colors.orange, strokeWidth=2, strokeDashArray=[4, 3]
+        ))
+        drawing.add(String(
+            target_x + 4, chart.y + chart.height - 10, 'Target (60%)',
+            fontName='Helvetica', fontSize=8, fillColor=colors.orange
+        ))
+        
+        drawing.add(String(
+            drawing.width / 2, height - 14, 'Topic Accuracy Overview',
+            fontName='Helvetica-Bold', fontSize=13, textAnchor='middle'
+        ))
+        drawing.add(String(
+            chart.x + chart.width / 2, 0.1*inch, 'Accuracy (%)',
+            fontName='Helvetica', fontSize=11, textAnchor='middle'
+        ))
+        
+        return drawing
+    
     def _create_topic_performance(self, analytics: Dict) -> List:
         """Match dashboard Topic Performance Analysis."""
         elements = []
@@ -190,55 +351,24 @@ class TestReportGenerator:
         
         topic_perf = analytics['topic_performance']
         
-        # Bar chart
-        fig, ax = plt.subplots(figsize=(7, 4))
-        
-        topics = list(topic_perf.keys())
-        accuracies = [stats['accuracy'] for stats in topic_perf.values()]
-        colors_bar = ['#28a745' if a >= 75 else '#ffc107' if a >= 60 else '#dc3545' for a in accuracies]
-        
-        bars = ax.barh(topics, accuracies, color=colors_bar)
-        ax.axvline(x=60, color='orange', linestyle='--', linewidth=2, label='Target (60%)')
-        ax.set_xlabel('Accuracy (%)', fontsize=11)
-        ax.set_title('Topic Accuracy Overview', fontsize=13, fontweight='bold')
-        ax.set_xlim(0, 100)
-        ax.legend()
-        ax.grid(axis='x', alpha=0.3)
-        
-        plt.tight_layout()
-        
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        img = Image(img_buffer, width=6*inch, height=3*inch)
-        elements.append(img)
-        elements.append(Spacer(1, 0.2*inch))
+        # Bar chart (drawn as vector graphics, no image rendering)
+        if topic_perf:
+            elements.append(self._topic_bar_chart(topic_perf))
+            elements.append(Spacer(1, 0.2*inch))
         
         # Topic table
         topic_data = [['Topic', 'Accuracy', 'Correct/Total', 'Status']]
-        for topic, stats in sorted(topic_perf.items(), key=lambda x: x[1]['accuracy'], reverse=True):
-            status = '🟢 Strong' if stats['accuracy'] >= 75 else ('🟡 Moderate' if stats['accuracy'] >= 60 else '🔴 Weak')
+        for topic in _ranked_topics(analytics):
+            stats = topic_perf[topic]
             topic_data.append([
                 topic,
                 f"{stats['accuracy']:.1f}%",
                 f"{stats['correct']}/{stats['total_attempts']}",
-                status
+                _topic_status(stats['accuracy'])
             ])
         
         table = Table(topic_data, colWidths=[2.5*inch, 1.2*inch, 1.2*inch, 1.1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ]))
+        table.setStyle(TOPIC_TABLE_STYLE)
         
         elements.append(table)
         elements.append(Spacer(1, 0.2*inch))
@@ -254,67 +384,45 @@ class TestReportGenerator:
         risk_data = analytics['risk_classification']
         risk_stats = risk_data['stats']
         
+        card = self.styles['CardText']
+        
         # Risk summary cards (3 columns)
         summary_data = [[
-            Paragraph("<b>🔴 High Risk</b>", self.styles['CardText']),
-            Paragraph("<b>🟡 Medium Risk</b>", self.styles['CardText']),
-            Paragraph("<b>🟢 Low Risk</b>", self.styles['CardText'])
+            Paragraph("<b>🔴 High Risk</b>", card),
+            Paragraph("<b>🟡 Medium Risk</b>", card),
+            Paragraph("<b>🟢 Low Risk</b>", card)
         ], [
-            Paragraph(f"<font size=18><b>{risk_stats['high_risk_count']}</b></font>", self.styles['CardText']),
-            Paragraph(f"<font size=18><b>{risk_stats['medium_risk_count']}</b></font>", self.styles['CardText']),
-            Paragraph(f"<font size=18><b>{risk_stats['low_risk_count']}</b></font>", self.styles['CardText'])
+            Paragraph(_big_number(risk_stats['high_risk_count'], size=18), card),
+            Paragraph(_big_number(risk_stats['medium_risk_count'], size=18), card),
+            Paragraph(_big_number(risk_stats['low_risk_count'], size=18), card)
         ], [
-            Paragraph("Students < 40%", self.styles['CardText']),
-            Paragraph("Students 40-65%", self.styles['CardText']),
-            Paragraph("Students > 65%", self.styles['CardText'])
+            Paragraph("Students < 40%", card),
+            Paragraph("Students 40-65%", card),
+            Paragraph("Students > 65%", card)
         ]]
         
         table = Table(summary_data, colWidths=[2*inch]*3)
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8d7da')),
-            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#fff3cd')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#d4edda')),
-            ('BOX', (0, 0), (-1, -1), 1, colors.grey),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ]))
+        table.setStyle(RISK_SUMMARY_TABLE_STYLE)
         
         elements.append(table)
         elements.append(Spacer(1, 0.3*inch))
         
         # Student performance table
-        elements.append(Paragraph("<b>Student Performance Table</b>", self.styles['CardText']))
+        elements.append(Paragraph("<b>Student Performance Table</b>", card))
         elements.append(Spacer(1, 0.1*inch))
         
-        all_students = []
-        for student in risk_data['high_risk']:
-            all_students.append({'name': student['name'], 'percentage': student['percentage'], 'risk': '🔴 High Risk'})
-        for student in risk_data['medium_risk']:
-            all_students.append({'name': student['name'], 'percentage': student['percentage'], 'risk': '🟡 Medium Risk'})
-        for student in risk_data['low_risk']:
-            all_students.append({'name': student['name'], 'percentage': student['percentage'], 'risk': '🟢 Low Risk'})
-        
+        students = risk_data['students']
         student_data = [['Student', 'Score (%)', 'Risk Level']]
-        for student in all_students[:20]:  # Limit to 20 for PDF space
+        for name, percentage, risk in zip(students['names'], students['percentages'], students['risk']):
             student_data.append([
-                student['name'],
-                f"{student['percentage']:.1f}%",
-                student['risk']
+                name,
+                f"{percentage:.1f}%",
+                risk
             ])
         
-        student_table = Table(student_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-        student_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ]))
+        # Every student is listed; LongTable splits across pages and repeats the header
+        student_table = LongTable(student_data, colWidths=[3*inch, 1.5*inch, 1.5*inch], repeatRows=1)
+        student_table.setStyle(STUDENT_TABLE_STYLE)
         
         elements.append(student_table)
         elements.append(Spacer(1, 0.3*inch))
@@ -327,31 +435,19 @@ class TestReportGenerator:
         
         elements.append(Paragraph("🤖 AI-Powered Insights", self.styles['SectionHeading']))
         
-        if not ai_insights:
-            elements.append(Paragraph("AI insights unavailable", self.styles['CardText']))
-            return elements
+        card = self.styles['CardText']
         
         # 2x2 grid of insight cards
         insights_data = [[
-            Paragraph(f"<b>📝 Summary</b><br/>{ai_insights.get('summary', 'N/A')}", self.styles['CardText']),
-            Paragraph(f"<b>⚠️ Areas of Concern</b><br/>{ai_insights.get('weaknesses', 'N/A')}", self.styles['CardText'])
+            Paragraph(f"<b>📝 Summary</b><br/>{ai_insights.get('summary', 'N/A')}", card),
+            Paragraph(f"<b>⚠️ Areas of Concern</b><br/>{ai_insights.get('weaknesses', 'N/A')}", card)
         ], [
-            Paragraph(f"<b>✅ Strengths</b><br/>{ai_insights.get('strengths', 'N/A')}", self.styles['CardText']),
-            Paragraph(f"<b>🎯 Action Items</b><br/>{ai_insights.get('action_items', 'N/A')}", self.styles['CardText'])
+            Paragraph(f"<b>✅ Strengths</b><br/>{ai_insights.get('strengths', 'N/A')}", card),
+            Paragraph(f"<b>🎯 Action Items</b><br/>{ai_insights.get('action_items', 'N/A')}", card)
         ]]
         
         table = Table(insights_data, colWidths=[3*inch]*2)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e7f3ff')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#0066cc')),
-            ('INNERGRID', (0, 0), (-1, -1), 1, colors.HexColor('#0066cc')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ]))
+        table.setStyle(INSIGHTS_TABLE_STYLE)
         
         elements.append(table)
         elements.append(Spacer(1, 0.3*inch))
@@ -367,16 +463,18 @@ class TestReportGenerator:
         revision_plan: Optional[str] = None,
         output_path: Optional[str] = None
     ) -> io.BytesIO:
-        """Generate PDF matching dashboard layout."""
+        """
+        Generate PDF matching dashboard layout.
         
-        if output_path:
-            buffer = open(output_path, 'wb')
-        else:
-            buffer = io.BytesIO()
+        The PDF is always built in memory; when output_path is given the
+        same bytes are also written there (no read-back from disk).
+        """
+        buffer = io.BytesIO()
         
-        doc = SimpleDocTemplate(buffer, pagesize=letter,
-                                rightMargin=0.75*inch, leftMargin=0.75*inch,
-                                topMargin=1*inch, bottomMargin=1*inch)
+        doc = BaseDocTemplate(buffer, pagesize=letter)
+        doc.addPageTemplates([
+            PageTemplate(id='report', frames=[Frame(*self._frame_box, id='main')])
+        ])
         
         story = []
         
@@ -397,8 +495,9 @@ class TestReportGenerator:
         # Risk Classification
         story.extend(self._create_risk_classification(analytics))
         
-        # AI Insights
-        story.extend(self._create_ai_insights(ai_insights or {}))
+        # AI Insights (section left out when there are none)
+        if ai_insights:
+            story.extend(self._create_ai_insights(ai_insights))
         
         # Footer
         story.append(Spacer(1, 0.5*inch))
@@ -410,19 +509,33 @@ class TestReportGenerator:
         
         doc.build(story)
         
-        if not output_path:
-            buffer.seek(0)
-        else:
-            buffer.close()
-            buffer = open(output_path, 'rb')
-            buffer = io.BytesIO(buffer.read())
+        if output_path:
+            with open(output_path, 'wb') as f:
+                f.write(buffer.getbuffer())
         
+        buffer.seek(0)
         return buffer
 
 
 # Global instance
 report_generator = TestReportGenerator()
 
+_report_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_report_cache_lock = threading.Lock()
+
+
+def _json_default(obj):
+    """Serialize numpy arrays/scalars in full (str() would elide long arrays)."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+def _report_key(*parts) -> str:
+    """Stable digest of the report inputs."""
+    encoded = json.dumps(parts, sort_keys=True, default=_json_default).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
 
 def generate_test_report(
     test_title: str,
@@ -431,7 +544,31 @@ def generate_test_report(
     ai_insights: Optional[Dict] = None,
     revision_plan: Optional[str] = None
 ) -> io.BytesIO:
-    """Generate PDF report matching dashboard."""
-    return report_generator.generate_report(
-        test_title, test_subject, analytics, ai_insights, revision_plan
-    )
\ No newline at end of file
+    """
+    Generate PDF report matching dashboard.
+    
+    Identical inputs on the same day reuse the previously rendered PDF (its
+    header is stamped with the date only). New submissions change the
+    analytics and therefore the key.
+    """
+    key = _report_key(
+        test_title, test_subject, analytics, ai_insights, revision_plan,
+        datetime.now().strftime('%Y-%m-%d')
+    )
+    
+    with _report_cache_lock:
+        pdf_bytes = _report_cache.get(key)
+        if pdf_bytes is not None:
+            _report_cache.move_to_end(key)
+    
+    if pdf_bytes is None:
+        pdf_bytes = report_generator.generate_report(
+            test_title, test_subject, analytics, ai_insights, revision_plan
+        ).getvalue()
+        with _report_cache_lock:
+            _report_cache[key] = pdf_bytes
+            if len(_report_cache) > REPORT_CACHE_SIZE:
+                _report_cache.popitem(last=False)
+    
+    # Fresh buffer per caller so positions are never shared
+    return io.BytesIO(pdf_bytes)
\ No newline at end of file